@@ -0,0 +1,82 @@
+"""Buffered writer for the global_choices counters.
+
+Turns used to make two synchronous update_one() round trips to MongoDB before
+answering. ChoiceAnalytics aggregates the {event}_{choice} / {event}_total
+increments in memory and writes them as ONE unordered bulk_write of $inc
+upserts, on a size or age threshold or from a background thread.
+
+The collection is fetched through a callable, and only at flush time, so
+record() never touches the network and a flush degrades to dropping the batch
+whenever the DB isn't ONLINE. Tests can hand in mongomock or any object with a
+bulk_write() method.
+"""
+import atexit
+import threading
+import time
+from collections import Counter
+
+
+class ChoiceAnalytics:
+    def __init__(self, get_collection, max_pending=100, max_age=5.0, background=True):
+        self.get_collection = get_collection
+        self.max_pending = max_pending
+        self.max_age = max_age
+        self.background = background
+        self._pending = Counter()
+        self._since = None
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stop = threading.Event()
+        self._tasks = []
+
+    def record(self, event_id, choice_idx):
+        with self._lock:
+            self._pending[f"{event_id}_{choice_idx}"] += 1
+            self._pending[f"{event_id}_total"] += 1
+            if self._since is None: self._since = time.monotonic()
+        if self.background and self._thread is None: self.start()
+
+    def due(self):
+        with self._lock:
+            if not self._pending: return False
+            return len(self._pending) >= self.max_pending or time.monotonic() - self._since >= self.max_age
+
+    def maybe_flush(self):
+        return self.flush() if self.due() else 0
+
+    def flush(self):
+        with self._lock:
+            pending, self._pending = self._pending, Counter()
+            self._since = None
+        if not pending: return 0
+        col = self.get_collection()
+        if col is None: return 0  # DB went away: drop, like the old silent path
+        try:
+            from pymongo import UpdateOne
+            col.bulk_write([UpdateOne({"_id": k}, {"$inc": {"count": n}}, upsert=True) for k, n in pending.items()], ordered=False)
+        except:
+            return 0
+        return len(pending)
+
+    # --- BACKGROUND FLUSHER ---
+    def add_task(self, task):
+        """Also run task() on the background thread, after every flush check."""
+        self._tasks.append(task)
+
+    def start(self):
+        with self._lock:
+            if self._thread is not None: return
+            self._thread = threading.Thread(target=self._run, name="choice-analytics", daemon=True)
+        self._thread.start()
+        atexit.register(self.stop)
+
+    def _run(self):
+        while not self._stop.wait(self.max_age):
+            self.maybe_flush()
+            for task in self._tasks:
+                try: task()
+                except: pass  # a failing task must not stop the flusher
+
+    def stop(self):
+        self._stop.set()
+        self.flush()
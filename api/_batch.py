@@ -0,0 +1,165 @@
+"""Vectorized batch engine for balance tuning.
+
+Steps N independent games at once. Stats are the same dict shape as in
+simulate.py, but every value is a NumPy array with one slot per game.
+run_simulation_batch() mirrors run_simulation() operation for operation, so
+game i gives the same numbers as the scalar path when both draw their noise
+from the same seeded stream (see noise_streams()).
+
+Also home to the helpers the offline tools (scripts/train_brain.py,
+balance.py, sweep.py) share: scoring, the catalog's option mods, scripted
+player policies and per-game RNG streams.
+"""
+import random
+
+import numpy as np
+
+import simulate
+from simulate import EVENT_CATALOG, START_STATS, brain_bucket, calculate_score, get_virus_action
+
+STAT_KEYS = ("pop", "trust", "eco", "inf", "cure")
+
+# ==========================================
+# AI POLICY (ARRAY GATHER)
+# ==========================================
+def policy_index(stats):
+    # Discretized (inf, trust, cure) state of every game, 0..26 (flat VIRUS_POLICY index)
+    return brain_bucket(stats['inf']) * 9 + brain_bucket(stats['trust']) * 3 + brain_bucket(stats['cure'])
+
+# ==========================================
+# BATCH STATE
+# ==========================================
+def new_batch(n, stats=None):
+    base = dict(START_STATS, **(stats or {}))
+    batch = {k: np.full(n, float(base[k])) for k in STAT_KEYS}
+    batch['day'] = np.full(n, int(base['day']), dtype=np.int64)
+    batch['mutated_strain_active'] = np.full(n, bool(base.get('mutated_strain_active', False)))
+    return batch
+
+def unpack(batch, i):
+    # Game i as a plain stats dict (the shape run_simulation() works on)
+    stats = {k: float(batch[k][i]) for k in STAT_KEYS}
+    stats['day'] = int(batch['day'][i])
+    if batch['mutated_strain_active'][i]: stats['mutated_strain_active'] = True
+    return stats
+
+def noise_streams(rngs, days, params=None):
+    # (days, n) noise matrix; column i is what game i's Generator would hand
+    # run_simulation() one call at a time.
+    sd = (params or simulate.SIM_PARAMS).noise_sd
+    return np.stack([g.normal(0, sd, size=days) for g in rngs], axis=1)
+
+# ==========================================
+# VECTORIZED LOGIC ENGINE
+# ==========================================
+def run_simulation_batch(stats, choice_mods=None, noise=None, rng=None, policy=None, ai_action=None, params=None):
+    """One day for every game in the batch.
+
+    choice_mods maps stat -> scalar or (n,) array. noise is the (n,) growth
+    noise for this day; if omitted it is drawn from rng (a numpy Generator).
+    The virus acts from the live VIRUS_POLICY unless policy (a flat 27-slot
+    table, see policy_index()) or ai_action (per-game actions, for training
+    exploration) is given. params is a simulate.SimParams (default: the live
+    SIM_PARAMS).
+    Returns (new_stats, ai_action, hospitals_collapsed) where the last two are
+    per-game arrays standing in for run_simulation()'s narrative flavor.
+    """
+    p = params or simulate.SIM_PARAMS
+    s = dict(stats)
+    for k, v in (choice_mods or {}).items():
+        if k in STAT_KEYS: s[k] = np.clip(s[k] + v, 0, 100)
+    s['day'] = s['day'] + 1
+    n = s['day'].shape[0]
+
+    # AI LOGIC
+    ai_day = s['day'] % 5 == 0
+    if ai_action is None:
+        ai_action = get_virus_action(s['inf'], s['trust'], s['cure']) if policy is None else policy[policy_index(s)]
+    ai_action = np.where(ai_day, ai_action, 0)
+    aggressive = ai_action == 1; destabilized = ai_action == 2
+    r0 = np.where(aggressive, p.r0_aggressive, np.where(destabilized, p.r0_destabilized, p.r0_base))
+    s['inf'] = s['inf'] + p.aggressive_inf * aggressive
+    s['cure'] = np.where(destabilized, np.minimum(100, s['cure'] + p.destabilized_cure), s['cure'])
+
+    # EPIDEMIOLOGY MATH
+    compliance = s['trust'] / 100.0; activity = s['eco'] / 100.0
+    r0 = r0 + p.mutation_r0_bonus * s['mutated_strain_active']
+
+    r_eff = (r0 * (0.5 + 0.5 * activity)) * (1 - p.compliance_factor * compliance)
+    inf = s['inf']; growth = (r_eff * inf) - inf
+
+    # CURE IMPACT
+    growth = growth - np.where(s['cure'] > p.cure_threshold, s['cure'] * p.cure_coef, 0.0)
+
+    if noise is None: noise = (rng or np.random).normal(0, p.noise_sd, size=n)
+    growth = growth + noise
+    s['inf'] = np.round(np.clip(inf + growth, 0, 100), 1)
+
+    # MORTALITY MATH
+    mortality = np.full(n, float(p.mortality_base))
+    mortality += p.mortality_add_1 * (s['inf'] > p.mortality_inf_1)
+    mortality += p.mortality_add_2 * (s['inf'] > p.mortality_inf_2)
+    mortality += p.mortality_add_3 * (s['inf'] > p.mortality_inf_3)
+
+    # Hospital Collapse Check
+    hospital_capacity = p.hospital_base + (s['eco'] * p.hospital_eco_coef)
+    collapsed = (s['inf'] * p.hospital_load) > hospital_capacity
+    mortality += p.collapse_mortality * collapsed
+
+    s['pop'] = np.round(np.maximum(0, s['pop'] - mortality), 1)
+
+    decay = p.eco_decay + p.eco_decay_infected * (s['inf'] > p.eco_decay_inf)
+    s['eco'] = np.round(np.maximum(0, s['eco'] - decay), 1)
+
+    return s, ai_action, collapsed
+
+# ==========================================
+# GAME OVER CHECK
+# ==========================================
+# Codes returned by check_endings(); same precedence as get_next_event()
+ENDINGS = (None, "ending_extinction", "ending_revolution", "ending_collapse", "ending_victory")
+
+def check_endings(stats):
+    code = np.zeros(stats['day'].shape[0], dtype=np.int8)
+    for c, hit in ((4, stats['cure'] >= 95), (3, stats['eco'] <= 5), (2, stats['trust'] <= 10),
+                   (1, stats['pop'] < 10), (1, stats['inf'] >= 99)):
+        code[hit] = c  # applied lowest priority first so the earliest check wins
+    return code
+
+# Ending bonuses from calculate_score(), indexed by check_endings() code
+ENDING_BONUS = np.array([calculate_score({'day': 0, 'pop': 0, 'trust': 0}, e) for e in ENDINGS], dtype=float)
+
+def batch_score(b):
+    # calculate_score() without the ending bonus, for a whole batch
+    return b['day'] * 100 + b['pop'] * 50 + b['trust'] * 20 + b['cure'] * 10
+
+# ==========================================
+# OFFLINE TOOLS (shared by scripts/)
+# ==========================================
+def choice_mods_matrix():
+    # Every option in the catalog as a row of (pop, trust, eco, inf, cure) deltas
+    rows = [[c.get("mods", {}).get(k, 0) for k in STAT_KEYS] for ev in EVENT_CATALOG.values() for c in ev["choices"]]
+    return np.array(rows, dtype=float)
+
+def make_policy(spec):
+    """Scripted player for the turn loop: random | greedy:<stat> | always:<k>."""
+    name, _, arg = spec.partition(":")
+    if name == "random":
+        return lambda event, rng: rng.randrange(len(event["choices"]))
+    if name == "greedy":
+        sign = -1 if arg.startswith("-") else 1; stat = arg.lstrip("-+")
+        if not stat: raise ValueError("greedy needs a stat, e.g. greedy:trust")
+        return lambda event, rng: max(range(len(event["choices"])), key=lambda i: sign * event["choices"][i].get("mods", {}).get(stat, 0))
+    if name == "always":
+        k = int(arg or 0)
+        return lambda event, rng: min(k, len(event["choices"]) - 1)
+    raise ValueError(f"unknown policy: {spec}")
+
+def game_rngs(seed):
+    # (sim, event, choice) streams for game `seed`, independent of each other and
+    # of every other game's (Random(~seed) would be Random(seed + 1): abs() seeding)
+    return np.random.default_rng(seed), random.Random(seed), random.Random(f"choice:{seed}")
+
+def init_worker(brain_path):
+    # Process-pool initializer: evaluate brain_path's virus policy instead of the deployed one
+    if brain_path and not simulate.load_virus_brain(brain_path): raise SystemExit(f"could not load {brain_path}")
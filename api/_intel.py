@@ -0,0 +1,91 @@
+"""Global intel: what share of commanders picked each option.
+
+ChoiceAnalytics only ever writes the player_choices counters ({event}_{choice}
+and {event}_total). Reading them back per turn would cost a query on every
+request, so the percentages are materialized instead: build_snapshot() turns
+the whole counter collection into one compact document
+
+    {"_id": "latest", "built_at": <unix time>, "events": {event_id: [total, pct0, pct1, ...]}}
+
+and IntelSnapshot keeps that document in memory. choice_share() is a dict
+lookup. Only scripts/materialize_intel.py (on a schedule) rebuilds the
+document from the counters; game servers just re-read it every `ttl` seconds
+from maybe_refresh(), which runs on the analytics background thread, so no
+request ever waits on the DB for it.
+"""
+import threading
+import time
+
+
+def build_snapshot(docs, catalog=None):
+    """{event_id: [total, pct per choice]} from player_choices documents.
+
+    With a catalog, unknown events and out-of-range choice indexes (the
+    counters take whatever the client sent) are dropped.
+    """
+    counts = {}
+    for d in docs:
+        event_id, _, choice = str(d.get("_id", "")).rpartition("_")
+        if not event_id or not choice.isdigit(): continue  # {event}_total and junk
+        c = int(choice)
+        if catalog is not None:
+            ev = catalog.get(event_id)
+            if ev is None or c >= len(ev["choices"]): continue
+        row = counts.setdefault(event_id, {})
+        row[c] = row.get(c, 0) + int(d.get("count", 0))
+
+    events = {}
+    for event_id, row in counts.items():
+        total = sum(row.values())
+        if total <= 0: continue
+        n = len(catalog[event_id]["choices"]) if catalog is not None else max(row) + 1
+        events[event_id] = [total] + [round(100 * row.get(c, 0) / total) for c in range(n)]
+    return events
+
+
+def materialize(choices_col, intel_col, catalog=None):
+    """Rebuild the snapshot from the counters and store it. Returns the document."""
+    doc = {"built_at": time.time(), "events": build_snapshot(choices_col.find({}), catalog)}
+    intel_col.update_one({"_id": "latest"}, {"$set": doc}, upsert=True)
+    return doc
+
+
+class IntelSnapshot:
+    def __init__(self, get_collection, ttl=60.0, min_samples=20):
+        self.get_collection = get_collection  # -> intel collection or None
+        self.ttl = ttl
+        self.min_samples = min_samples
+        self._events = {}
+        self._checked_at = None
+        self._refreshing = threading.Lock()
+
+    def __len__(self):
+        return len(self._events)
+
+    def choice_share(self, event_id, choice_idx):
+        """Percent of commanders who took this choice, or None if too few samples."""
+        row = self._events.get(event_id)
+        if row is None or row[0] < self.min_samples or not isinstance(choice_idx, int) or not 0 <= choice_idx < len(row) - 1: return None
+        return row[choice_idx + 1]
+
+    def due(self):
+        return self._checked_at is None or time.monotonic() - self._checked_at >= self.ttl
+
+    def maybe_refresh(self):
+        return self.refresh() if self.due() else False
+
+    def refresh(self):
+        if not self._refreshing.acquire(blocking=False): return False  # another thread is on it
+        try:
+            self._checked_at = time.monotonic()  # offline or failing: try again after ttl, not every tick
+            intel_col = self.get_collection()
+            if intel_col is None: return False
+            try:
+                doc = intel_col.find_one({"_id": "latest"})
+            except:
+                return False  # keep serving the old snapshot
+            if doc is None: return False  # not materialized yet
+            self._events = doc.get("events") or {}
+            return True
+        finally:
+            self._refreshing.release()
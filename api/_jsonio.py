@@ -0,0 +1,60 @@
+"""JSON encode/decode for the handler.
+
+Uses orjson when it is installed and falls back to the stdlib json module
+otherwise. Both paths produce compact UTF-8 bytes.
+
+Catalog events never change, so EventPayloads encodes each event's narrative
+and choices once per process. dumps(obj, raw) splices those cached bytes into
+the response instead of re-encoding the same choices for every player.
+"""
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+BACKEND = "orjson" if orjson else "json"
+
+
+def _default(o):
+    # numpy scalars (np.float64 from the noise draw, np.int8 actions)
+    if hasattr(o, "item"): return o.item()
+    raise TypeError(f"Object of type {type(o).__name__} is not JSON serializable")
+
+
+if orjson:
+    def loads(data):
+        return orjson.loads(data)
+
+    def _encode(obj):
+        return orjson.dumps(obj, default=_default, option=orjson.OPT_SERIALIZE_NUMPY)
+else:
+    def loads(data):
+        return json.loads(data)
+
+    def _encode(obj):
+        return json.dumps(obj, separators=(',', ':'), ensure_ascii=False, default=_default).encode()
+
+
+def dumps(obj, raw=None):
+    """Encode obj to bytes; raw maps extra keys to already-encoded JSON values."""
+    body = _encode(obj)
+    if not raw: return body
+    extra = b",".join(_encode(k) + b":" + v for k, v in raw.items())
+    return body[:-1] + (b"," if len(body) > 2 else b"") + extra + b"}"
+
+
+class EventPayloads:
+    """Lazily cached (narrative_bytes, choices_bytes) per catalog event id."""
+    def __init__(self, catalog):
+        self.catalog = catalog
+        self._cache = {}
+
+    def get(self, event_id):
+        hit = self._cache.get(event_id)
+        if hit is None:
+            ev = self.catalog.get(event_id)
+            if ev is None: return None
+            hit = self._cache[event_id] = (_encode(ev["text"]), _encode(ev["choices"]))
+        return hit
@@ -0,0 +1,92 @@
+"""Leaderboard read cache and atomic score upsert.
+
+The leaderboard is read far more often than it changes, so the top-K list is
+kept in process for a short TTL and patched in place whenever this instance
+saves a better score. Other instances' submissions show up when the TTL
+expires.
+
+Writes are one atomic upsert on the player's own row: a pipeline update keeps
+the $max of the stored and new score and swaps in name/days/ending only when
+the new score is higher. The pre-image it returns says whether the entry
+won, with no find_one/update_one race. Correctness does not depend on the
+unique user_id index; the index only stops two first-ever submissions from
+inserting twice.
+"""
+import threading
+import time
+
+INDEX_RETRY = 300.0  # seconds between attempts when index creation fails
+
+
+class LeaderboardCache:
+    def __init__(self, get_collection, k=10, ttl=15.0):
+        self.get_collection = get_collection
+        self.k = k
+        self.ttl = ttl
+        self._top = None
+        self._fetched_at = 0.0
+        self._indexed = False
+        self._index_retry_at = 0.0
+        self._lock = threading.Lock()
+
+    def ensure_indexes(self, col):
+        if self._indexed or time.monotonic() < self._index_retry_at: return
+        try:
+            col.create_index([("score", -1)])
+            col.create_index("user_id", unique=True)
+        except:
+            # e.g. legacy duplicate user_ids: keep serving, try again later
+            self._index_retry_at = time.monotonic() + INDEX_RETRY
+        else:
+            self._indexed = True
+
+    def top(self):
+        with self._lock:
+            if self._top is not None and time.monotonic() - self._fetched_at < self.ttl: return list(self._top)
+        col = self.get_collection()
+        if col is None: return []
+        try:
+            self.ensure_indexes(col)
+            scores = list(col.find({}, {'_id': 0}).sort("score", -1).limit(self.k))
+        except:
+            with self._lock: return list(self._top or [])  # stale beats empty
+        with self._lock:
+            self._top, self._fetched_at = scores, time.monotonic()
+        return list(scores)
+
+    def submit(self, entry):
+        """Save entry (user_id, name, score, days, ending) if it beats the stored score.
+
+        Returns True if the entry was written.
+        """
+        col = self.get_collection()
+        if col is None: return False
+        from pymongo import ReturnDocument
+        from pymongo.errors import DuplicateKeyError
+
+        self.ensure_indexes(col)
+        score = entry["score"]
+        wins = {"$lt": ["$score", score]}  # a missing score sorts below any number
+        fields = {k: {"$cond": [wins, {"$literal": v}, "$" + k]} for k, v in entry.items() if k not in ("user_id", "score")}
+        update = [{"$set": dict(fields, score={"$max": ["$score", score]})}]
+        for attempt in range(2):
+            try:
+                before = col.find_one_and_update({"user_id": entry["user_id"]}, update, projection={"_id": 0, "score": 1},
+                                                 upsert=True, return_document=ReturnDocument.BEFORE)
+                break
+            except DuplicateKeyError:
+                if attempt: return False  # raced another first submission; its row now exists
+        if before is not None and before.get("score") is not None and before["score"] >= score: return False
+        self._apply(entry)
+        return True
+
+    def _apply(self, entry):
+        with self._lock:
+            if self._top is None: return
+            top = [e for e in self._top if e.get("user_id") != entry["user_id"]]
+            top.append(dict(entry))
+            top.sort(key=lambda e: e["score"], reverse=True)
+            self._top = top[:self.k]
+
+    def invalidate(self):
+        with self._lock: self._top = None
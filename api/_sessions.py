@@ -0,0 +1,104 @@
+"""Server-authoritative game sessions.
+
+In session mode the server owns each game's state (stats, played events, last
+event, RNG seed, turn counter) and the client only sends session_id and
+choice_index. States are opaque here apart from their .turn attribute
+(simulate.GameState in practice). That shrinks requests, and a client can't edit its stats before
+submit_score.
+
+SessionCache is an in-process LRU with TTL eviction. On its own it is the
+store, which is fine for a single long-lived server. Give it a backing store
+(MongoSessionStore, or anything with load/save) and it writes through, so a
+session survives eviction and can be served by any instance. Every save
+carries the turn it was computed from, so two racing requests for one session
+can't both land.
+"""
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+
+
+class MongoSessionStore:
+    def __init__(self, get_collection, ttl=3600, to_doc=dict, from_doc=None):
+        self.get_collection = get_collection
+        self.ttl = ttl
+        self.to_doc = to_doc  # state -> dict with a "turn" field
+        self.from_doc = from_doc
+        self._indexed = False
+
+    def _col(self):
+        col = self.get_collection()
+        if col is None: raise RuntimeError("SESSION STORE OFFLINE")
+        if not self._indexed:
+            col.create_index("updated_at", expireAfterSeconds=int(self.ttl))
+            self._indexed = True
+        return col
+
+    def load(self, sid):
+        doc = self._col().find_one({"_id": sid}, {"_id": 0, "updated_at": 0})
+        return self.from_doc(doc) if doc is not None and self.from_doc else doc
+
+    def save(self, sid, state, prev_turn):
+        doc = dict(self.to_doc(state), updated_at=datetime.now(timezone.utc))
+        if prev_turn is None:
+            self._col().update_one({"_id": sid}, {"$set": doc}, upsert=True)
+            return True
+        res = self._col().update_one({"_id": sid, "turn": prev_turn}, {"$set": doc})
+        return res.matched_count == 1
+
+
+class SessionCache:
+    def __init__(self, store=None, max_size=50_000, ttl=3600):
+        self.store = store
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()  # sid -> (state, last_used)
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def create(self, state):
+        sid = secrets.token_urlsafe(16)
+        if self.store is not None: self.store.save(sid, state, None)
+        self._put(sid, state)
+        return sid
+
+    def get(self, sid, fresh=False):
+        """The session's state, or None. fresh=True skips the local copy and reads the store."""
+        now = time.monotonic()
+        if fresh and self.store is not None:
+            with self._lock: self._entries.pop(sid, None)
+        with self._lock:
+            hit = self._entries.get(sid)
+            if hit is not None:
+                if now - hit[1] < self.ttl:
+                    self._entries[sid] = (hit[0], now); self._entries.move_to_end(sid)
+                    return hit[0]
+                del self._entries[sid]
+        if self.store is None: return None
+        state = self.store.load(sid)
+        if state is not None: self._put(sid, state)
+        return state
+
+    def save(self, sid, state, prev_turn):
+        """Replace the session's state if it is still at prev_turn. Returns False on a lost race."""
+        if self.store is not None:
+            if not self.store.save(sid, state, prev_turn):
+                with self._lock: self._entries.pop(sid, None)  # someone else moved on: reload next time
+                return False
+            self._put(sid, state)
+            return True
+        with self._lock:
+            cur = self._entries.get(sid)
+            if cur is None or cur[0].turn != prev_turn: return False
+            self._entries[sid] = (state, time.monotonic()); self._entries.move_to_end(sid)
+        return True
+
+    def _put(self, sid, state):
+        with self._lock:
+            self._entries[sid] = (state, time.monotonic()); self._entries.move_to_end(sid)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
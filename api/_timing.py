@@ -0,0 +1,53 @@
+"""Opt-in per-stage timing for handler.do_POST.
+
+Enable with the TURN_TIMING environment variable:
+    TURN_TIMING=header   Server-Timing response header
+    TURN_TIMING=log      one JSON line per request on stderr
+    TURN_TIMING=1        both
+
+mark(stage) closes the stage that just ran, so call sites only need one line
+after each step. When timing is off the handler gets NULL_TIMER, whose mark()
+does nothing.
+"""
+import json
+import sys
+import time
+
+
+def timing_mode(env_value):
+    # -> (header, log) flags for a TURN_TIMING value
+    v = (env_value or "").strip().lower()
+    return v in ("1", "true", "both", "header"), v in ("1", "true", "both", "log")
+
+
+class StageTimer:
+    def __init__(self):
+        self.start = self.last = time.perf_counter()
+        self.stages = []
+
+    def mark(self, stage):
+        now = time.perf_counter()
+        self.stages.append((stage, now - self.last))
+        self.last = now
+
+    def total(self):
+        return self.last - self.start
+
+    def server_timing(self):
+        return ", ".join(f"{name};dur={sec * 1000:.3f}" for name, sec in self.stages)
+
+    def log(self, **fields):
+        line = {"timing_ms": {name: round(sec * 1000, 3) for name, sec in self.stages}, "total_ms": round(self.total() * 1000, 3)}
+        line.update(fields)
+        sys.stderr.write(json.dumps(line) + "\n")
+
+
+class _NullTimer:
+    stages = ()
+    def mark(self, stage): pass
+    def total(self): return 0.0
+    def server_timing(self): return ""
+    def log(self, **fields): pass
+
+
+NULL_TIMER = _NullTimer()
@@ -1,60 +1,161 @@
 from http.server import BaseHTTPRequestHandler
 import json
+import base64
+import hashlib
+import hmac
 import random
+import secrets
 import numpy as np
+import operator
+from collections import namedtuple
+from functools import reduce
+from itertools import repeat
 import os
 import sys
+import threading
+import time
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+API_DIR = os.path.dirname(os.path.abspath(__file__))
+if API_DIR not in sys.path: sys.path.insert(0, API_DIR)
+
+from _analytics import ChoiceAnalytics
+from _leaderboard import LeaderboardCache
+from _timing import NULL_TIMER, StageTimer, timing_mode
+from _jsonio import EventPayloads, dumps, loads
+from _sessions import MongoSessionStore, SessionCache
+from _intel import IntelSnapshot
 
 # ==========================================
 # 0. ROBUST DATABASE SETUP
 # ==========================================
+# VIRUS BRAIN: Q-table from virus_brain.json, precomputed into a dense 3x3x3
+# best-action array indexed by the (inf, trust, cure) buckets. Re-read when the
+# file's mtime changes, so a new policy rolls out without a redeploy.
+# A seeded game is pinned to the table it started with: the table is only 27
+# actions, so the game carries it whole as a "brain" code ("0120...", one digit
+# per state), signed with its seed. Turns and replay verification use that
+# code, so a rollout (or another instance) never changes an in-flight game.
+VIRUS_BRAIN_FILE = os.path.join(BASE_DIR, 'virus_brain.json')
+BRAIN_CHECK_SECONDS = 5.0
 VIRUS_BRAIN = {}
-try:
-    with open('virus_brain.json', 'r') as f:
-        VIRUS_BRAIN = json.load(f)
-except:
-    pass
-
-# GLOBAL DB STATE
-DB_STATUS = "Initializing..."
+VIRUS_POLICY = np.zeros((3, 3, 3), dtype=np.int8)
+VIRUS_POLICY_CODE = "0" * 27
+VIRUS_POLICIES = {VIRUS_POLICY_CODE: VIRUS_POLICY}  # every code this process has loaded
+_brain = {"path": VIRUS_BRAIN_FILE, "mtime": None, "checked_at": 0.0}
+
+def brain_bucket(x):
+    # <30 -> 0, <70 -> 1, else 2; plain comparisons so it serves scalars and arrays alike
+    return 1 * (x >= 30) + (x >= 70)
+
+def build_virus_policy(brain):
+    policy = np.zeros((3, 3, 3), dtype=np.int8)  # unknown states -> action 0
+    for key, q in brain.items():
+        if len(key) == 3 and all(ch in "012" for ch in key):
+            policy[int(key[0]), int(key[1]), int(key[2])] = int(np.argmax(q))
+    return policy
+
+def policy_code(policy):
+    return "".join(map(str, policy.reshape(-1).tolist()))
+
+def policy_from_code(code):
+    """The 3x3x3 table a brain code pins; ValueError if it isn't one."""
+    policy = VIRUS_POLICIES.get(code)
+    if policy is not None: return policy
+    if not isinstance(code, str) or len(code) != 27 or not set(code) <= set("012"): raise ValueError("BAD BRAIN CODE")
+    return (np.frombuffer(code.encode(), dtype=np.uint8) - 48).astype(np.int8).reshape(3, 3, 3)
+
+def load_virus_brain(path=None):
+    # Returns True if a new table was loaded; a missing/broken file keeps the current one.
+    # An explicit path always (re)loads and becomes the file watched from then on.
+    global VIRUS_BRAIN, VIRUS_POLICY, VIRUS_POLICY_CODE
+    if path: _brain["path"], _brain["mtime"] = path, None
+    _brain["checked_at"] = time.monotonic()
+    try:
+        mtime = os.stat(_brain["path"]).st_mtime_ns
+        if mtime == _brain["mtime"]: return False
+        with open(_brain["path"], 'r') as f:
+            brain = json.load(f)
+        VIRUS_BRAIN, VIRUS_POLICY = brain, build_virus_policy(brain)
+        VIRUS_POLICY_CODE = policy_code(VIRUS_POLICY); VIRUS_POLICIES[VIRUS_POLICY_CODE] = VIRUS_POLICY
+        _brain["mtime"] = mtime
+        return True
+    except:
+        return False
+
+load_virus_brain()
+
+# GLOBAL DB STATE (lazy: nothing connects until a request actually needs the DB)
+DB_STATUS = "NOT_CONNECTED"
+DB_RETRY_SECONDS = 30  # A failed ping is cached this long before we try again
 client = None
 db = None
 global_choices = None
 leaderboard_col = None
+_db_checked_at = 0.0
+_db_lock = threading.Lock()
 
-try:
-    from pymongo import MongoClient
-    
-    if 'MONGODB_URI' in os.environ:
-        # TIMEOUT FIX: Fail fast (3s) so Vercel doesn't kill the process
-        client = MongoClient(os.environ['MONGODB_URI'], serverSelectionTimeoutMS=3000)
-        
-        # Lazy Ping: We won't crash if this fails, just go offline
+def db_configured():
+    # True if a DB could ever come ONLINE -- answered without touching the network
+    return 'MONGODB_URI' in os.environ
+
+def get_db():
+    """Connect on first use and cache the client for the life of the process.
+
+    Returns the database if ONLINE, otherwise None. A failed health check is
+    remembered for DB_RETRY_SECONDS instead of taking the DB offline for good.
+    """
+    global DB_STATUS, client, db, global_choices, leaderboard_col, _db_checked_at
+    if DB_STATUS == "ONLINE": return db
+    with _db_lock:
+        if DB_STATUS == "ONLINE": return db
+        if DB_STATUS != "NOT_CONNECTED" and time.monotonic() - _db_checked_at < DB_RETRY_SECONDS: return None
+        _db_checked_at = time.monotonic()
         try:
-            client.admin.command('ping')
-            db = client['zero_hour_game']
-            global_choices = db['player_choices']
-            leaderboard_col = db['leaderboard']
-            DB_STATUS = "ONLINE"
-        except:
-            DB_STATUS = "OFFLINE_TIMEOUT"
-    else:
-        DB_STATUS = "MISSING_URI"
-except ImportError:
-    DB_STATUS = "MISSING_PACKAGES"
-except Exception as e:
-    DB_STATUS = f"ERROR: {str(e)}"
+            from pymongo import MongoClient
+
+            if db_configured():
+                # TIMEOUT FIX: Fail fast (3s) so Vercel doesn't kill the process
+                if client is None: client = MongoClient(os.environ['MONGODB_URI'], serverSelectionTimeoutMS=3000)
+
+                # We won't crash if this fails, just go offline until the next retry
+                try:
+                    client.admin.command('ping')
+                    db = client['zero_hour_game']
+                    global_choices = db['player_choices']
+                    leaderboard_col = db['leaderboard']
+                    DB_STATUS = "ONLINE"
+                except:
+                    DB_STATUS = "OFFLINE_TIMEOUT"
+            else:
+                DB_STATUS = "MISSING_URI"
+        except ImportError:
+            DB_STATUS = "MISSING_PACKAGES"
+        except Exception as e:
+            DB_STATUS = f"ERROR: {str(e)}"
+    return db if DB_STATUS == "ONLINE" else None
+
+# Choice counters are buffered and bulk-written off the turn's critical path
+CHOICE_ANALYTICS = ChoiceAnalytics(lambda: global_choices if get_db() is not None else None)
+
+# Top-10 served from memory (short TTL), patched on every score this instance saves
+LEADERBOARD = LeaderboardCache(lambda: leaderboard_col if get_db() is not None else None)
 
 # ==========================================
 # 1. SCORING & AI
 # ==========================================
-def get_virus_action(inf, trust, cure):
-    inf_lvl = 0 if inf < 30 else (1 if inf < 70 else 2)
-    trust_lvl = 0 if trust < 30 else (1 if trust < 70 else 2)
-    cure_lvl = 0 if cure < 30 else (1 if cure < 70 else 2)
-    key = f"{inf_lvl}{trust_lvl}{cure_lvl}"
-    if key in VIRUS_BRAIN: return int(np.argmax(VIRUS_BRAIN[key]))
-    return 0 
+def live_policy_code():
+    # The table new games start with (re-checking the file every BRAIN_CHECK_SECONDS)
+    if time.monotonic() - _brain["checked_at"] >= BRAIN_CHECK_SECONDS: load_virus_brain()
+    return VIRUS_POLICY_CODE
+
+def get_virus_action(inf, trust, cure, policy=None):
+    # Scalars for one game, or arrays for a whole batch -> one gather either way.
+    # policy: a pinned 3x3x3 table; default is the live one
+    if policy is None:
+        live_policy_code(); policy = VIRUS_POLICY
+    action = policy[brain_bucket(inf), brain_bucket(trust), brain_bucket(cure)]
+    return int(action) if np.ndim(action) == 0 else action
 
 def calculate_score(stats, ending_type):
     score = (stats['day'] * 100) + (stats['pop'] * 50) + (stats['trust'] * 20) + (stats.get('cure',0) * 10)
@@ -270,79 +371,200 @@ opt_3_pool = [
 ]
 
 # Generate 105 unique procedural events (ID: proc_100 to proc_204)
-# Using a fixed range ensures IDs are unique and filterable
-for i in range(100, 205):
-    sec = random.choice(sectors)
-    iss = random.choice(issues)
-    flav = random.choice(flavor_text)
-    
-    c1 = random.choice(opt_1_pool)
-    c2 = random.choice(opt_2_pool)
-    c3 = random.choice(opt_3_pool)
+# Using a fixed range ensures IDs are unique and filterable.
+# Seeded so every serverless instance builds the SAME pool (a turn resolved by
+# another warm instance must see the same mods for proc_150).
+PROC_SEED = 1337
+
+def build_procedural_events(seed=PROC_SEED):
+    rng = random.Random(seed)
+    events = {}
+    for i in range(100, 205):
+        sec = rng.choice(sectors)
+        iss = rng.choice(issues)
+        flav = rng.choice(flavor_text)
+
+        c1 = rng.choice(opt_1_pool)
+        c2 = rng.choice(opt_2_pool)
+        c3 = rng.choice(opt_3_pool)
+
+        events[f"proc_{i}"] = {
+            "text": f"REPORT: {sec} Sector\nAlert: {iss} reported.\n{flav}",
+            "choices": [
+                {"text": c1[0], "mods": dict(c1[1])},
+                {"text": c2[0], "mods": dict(c2[1])},
+                {"text": c3[0], "mods": dict(c3[1])}
+            ]
+        }
+    return events
+
+RANDOM_POOL.update(build_procedural_events())
+
+# --- EVENT CATALOG (built once per process) ---
+# id -> event for every playable event, plus per-category id tuples so a turn
+# never has to rescan the pools.
+EVENT_CATALOG = {f"day_{d}": ev for d, ev in STORY_ARCS.items()}
+EVENT_CATALOG.update(MUTATION_ARC)
+EVENT_CATALOG.update(RANDOM_POOL)
+
+# --- PLAYED-EVENT BITSET (compact protocol) ---
+# Every event gets a fixed integer index, so the played set can travel as a
+# ~30-byte base64 bitset instead of a growing list of ids. The id -> index
+# table is checked in (event_index.json) and append-only: new catalog events
+# take the next free index (scripts/build_event_index.py writes them back) and
+# retired ids keep their slot, so editing the pools never moves a live bit.
+# The payload's first byte is a version (BITSET_VERSION); bump it (and rewrite
+# the table) only if indices ever have to move, and old payloads are then
+# rejected. An unversioned payload has an odd first byte (day_1's bit is always
+# set), so it never matches.
+EVENT_INDEX_FILE = os.path.join(BASE_DIR, 'event_index.json')
+BITSET_VERSION = 2
+
+def load_event_index():
+    try:
+        with open(EVENT_INDEX_FILE, 'r') as f:
+            table = json.load(f)
+        ids = table["ids"] if table.get("version") == BITSET_VERSION else []
+    except:
+        ids = []
+    known = set(ids)
+    return tuple(ids) + tuple(eid for eid in EVENT_CATALOG if eid not in known)
+
+EVENT_IDS = load_event_index()
+EVENT_INDEX = {eid: i for i, eid in enumerate(EVENT_IDS)}
+EVENT_INDEX_BIT = {eid: 1 << i for i, eid in enumerate(EVENT_IDS)}
+BITSET_BYTES = (len(EVENT_IDS) + 7) // 8
+ALL_BITS = (1 << len(EVENT_IDS)) - 1
+
+def ids_to_bits(used_events):
+    return reduce(operator.or_, map(EVENT_INDEX_BIT.get, used_events, repeat(0)), 0)
+
+def bits_to_b64(bits):
+    return base64.urlsafe_b64encode(bytes((BITSET_VERSION,)) + bits.to_bytes(BITSET_BYTES, 'little')).decode()
+
+def b64_to_bits(used_bits):
+    if not used_bits: return 0
+    raw = base64.urlsafe_b64decode(used_bits)
+    if raw[0] != BITSET_VERSION: raise ValueError("STALE GAME STATE")
+    return int.from_bytes(raw[1:], 'little') & ALL_BITS
+
+def bits_to_ids(bits):
+    return [EVENT_IDS[i] for i in range(min(bits.bit_length(), len(EVENT_IDS))) if bits >> i & 1]
+
+def encode_used(used_events):
+    return bits_to_b64(ids_to_bits(used_events))
+
+def decode_used(used_bits):
+    return set(bits_to_ids(b64_to_bits(used_bits)))
+
+class EventPool(tuple):
+    # A category's ids in bit (EVENT_INDEX) order, with .mask the same set as a bitmask
+    def __new__(cls, ids):
+        pool = super().__new__(cls, sorted(ids, key=EVENT_INDEX.__getitem__))
+        pool.mask = ids_to_bits(pool)
+        return pool
+
+MUT_KEYS = EventPool(k for k in MUTATION_ARC if k.startswith("mut_p"))
+HANDWRITTEN_KEYS = EventPool(k for k in RANDOM_POOL if not k.startswith("proc_"))
+PROC_KEYS = EventPool(k for k in RANDOM_POOL if k.startswith("proc_"))
+RANDOM_KEYS = EventPool(HANDWRITTEN_KEYS + PROC_KEYS)
+
+# Pre-encoded narrative/choices bytes per catalog event, spliced into responses
+EVENT_PAYLOADS = EventPayloads(EVENT_CATALOG)
+
+# Global intel: per-choice percentages, materialized from the analytics
+# counters into one snapshot document (scripts/materialize_intel.py) and served
+# from memory. Re-read on the analytics thread, never on a request.
+INTEL = IntelSnapshot(lambda: db['choice_intel'] if get_db() is not None else None)
+CHOICE_ANALYTICS.add_task(INTEL.maybe_refresh)
 
-    eid = f"proc_{i}"
-    RANDOM_POOL[eid] = {
-        "text": f"REPORT: {sec} Sector\nAlert: {iss} reported.\n{flav}",
-        "choices": [
-            {"text": c1[0], "mods": c1[1]},
-            {"text": c2[0], "mods": c2[1]},
-            {"text": c3[0], "mods": c3[1]}
-        ]
-    }
-    
 # ==========================================
 # 3. LOGIC ENGINE
 # ==========================================
-def run_simulation(current_stats, choice_mods):
+# --- MODEL PARAMETERS ---
+# Every tuning constant of run_simulation() (and _batch.run_simulation_batch()).
+# SIM_PARAMS is what the game plays with; offline tools pass other sets as
+# params= (scripts/sweep.py) and never touch it. Changing the live set
+# changes the game: old replays stop verifying.
+SimParams = namedtuple("SimParams", (
+    "r0_base", "r0_aggressive", "r0_destabilized", "mutation_r0_bonus",  # virus spread per AI action / strain
+    "aggressive_inf", "destabilized_cure",                               # one-off AI action effects
+    "compliance_factor", "cure_threshold", "cure_coef", "noise_sd",      # growth
+    "mortality_base", "mortality_inf_1", "mortality_add_1", "mortality_inf_2", "mortality_add_2",
+    "mortality_inf_3", "mortality_add_3",                                # deaths per day by infection tier
+    "hospital_base", "hospital_eco_coef", "hospital_load", "collapse_mortality",
+    "eco_decay", "eco_decay_infected", "eco_decay_inf"), defaults=(
+    1.5, 2.8, 0.5, 1.5,
+    5, 5,
+    0.4, 20, 0.2, 1.5,
+    0.1, 40, 1.0, 70, 3.0,
+    90, 5.0,
+    40, 0.2, 1.5, 2.0,
+    0.2, 0.5, 30))
+SIM_PARAMS = SimParams()
+
+def run_simulation(current_stats, choice_mods, rng=None, params=None, policy=None):
+    p = params or SIM_PARAMS
     stats = current_stats.copy()
     for k, v in choice_mods.items():
         if k in stats: stats[k] = max(0, min(100, stats[k] + v))
     stats['day'] = stats.get('day', 1) + 1
 
     # AI LOGIC
-    narrative_flavor = ""; r0 = 1.5
+    narrative_flavor = ""; r0 = p.r0_base
     if stats['day'] % 5 == 0:
-        ai_action = get_virus_action(stats['inf'], stats['trust'], stats.get('cure', 0))
+        ai_action = get_virus_action(stats['inf'], stats['trust'], stats.get('cure', 0), policy)
         if ai_action == 1:
-            r0 = 2.8; stats['inf'] += 5; narrative_flavor = "CRITICAL: Virus has mutated for aggressive spread."
+            r0 = p.r0_aggressive; stats['inf'] += p.aggressive_inf; narrative_flavor = "CRITICAL: Virus has mutated for aggressive spread."
         elif ai_action == 2:
-            r0 = 0.5; stats['cure'] = min(100, stats.get('cure', 0) + 5); narrative_flavor = "OPPORTUNITY: Viral genetic structure destabilized."
+            r0 = p.r0_destabilized; stats['cure'] = min(100, stats.get('cure', 0) + p.destabilized_cure); narrative_flavor = "OPPORTUNITY: Viral genetic structure destabilized."
 
     # EPIDEMIOLOGY MATH
     compliance = stats['trust'] / 100.0; activity = stats['eco'] / 100.0
-    if stats.get('mutated_strain_active'): r0 += 1.5 # Increased from 1.0
+    if stats.get('mutated_strain_active'): r0 += p.mutation_r0_bonus # Increased from 1.0
 
-    r_eff = (r0 * (0.5 + 0.5 * activity)) * (1 - 0.4 * compliance)
+    r_eff = (r0 * (0.5 + 0.5 * activity)) * (1 - p.compliance_factor * compliance)
     inf = stats['inf']; growth = (r_eff * inf) - inf
     
     # CURE IMPACT
-    if stats.get('cure', 0) > 20: growth -= (stats['cure'] * 0.2) # Cure now fights virus harder
+    if stats.get('cure', 0) > p.cure_threshold: growth -= (stats['cure'] * p.cure_coef) # Cure now fights virus harder
     
-    growth += np.random.normal(0, 1.5)
+    growth += (rng or np.random).normal(0, p.noise_sd)
     stats['inf'] = round(max(0, min(100, inf + growth)), 1)
 
     # MORTALITY MATH (Aggressive Update)
-    mortality = 0.1
+    mortality = p.mortality_base
     # If Infection is high, people die faster
-    if stats['inf'] > 40: mortality += 1.0 
-    if stats['inf'] > 70: mortality += 3.0
-    if stats['inf'] > 90: mortality += 5.0
+    if stats['inf'] > p.mortality_inf_1: mortality += p.mortality_add_1
+    if stats['inf'] > p.mortality_inf_2: mortality += p.mortality_add_2
+    if stats['inf'] > p.mortality_inf_3: mortality += p.mortality_add_3
     
     # Hospital Collapse Check
-    hospital_capacity = 40 + (stats['eco'] * 0.2)
-    load = stats['inf'] * 1.5
+    hospital_capacity = p.hospital_base + (stats['eco'] * p.hospital_eco_coef)
+    load = stats['inf'] * p.hospital_load
     if load > hospital_capacity: 
-        mortality += 2.0 # Collapse penalty
+        mortality += p.collapse_mortality # Collapse penalty
         narrative_flavor += "\n[WARNING]: Hospitals overwhelmed."
 
     stats['pop'] = round(max(0, stats['pop'] - mortality), 1)
 
-    decay = 0.2 + (0.5 if stats['inf'] > 30 else 0)
+    decay = p.eco_decay + (p.eco_decay_infected if stats['inf'] > p.eco_decay_inf else 0)
     stats['eco'] = round(max(0, stats['eco'] - decay), 1)
 
     return stats, narrative_flavor
     
-def get_next_event(stats, used_events, forced_next):
+def pick_unused(keys, used_events, rng, tries=8):
+    # Rejection sampling keeps the pick O(1) expected (and uniform) while most
+    # of the category is still fresh; only a nearly exhausted one gets scanned.
+    for _ in range(tries):
+        eid = rng.choice(keys)
+        if eid not in used_events: return eid
+    available = used_events.unplayed(keys) if isinstance(used_events, GameState) else [k for k in keys if k not in used_events]
+    return rng.choice(available) if available else None
+
+def get_next_event(stats, used_events, forced_next, rng=None):
+    # used_events: anything supporting `in` -- pass a set for O(1) lookups
+    rng = rng or random
     # 1. CHECK FOR GAME OVER CONDITIONS
     if stats['inf'] >= 99: return "ending_extinction", {"text": "ENDING: TOTAL INFECTION\nThe virus has consumed the population. Society has collapsed.", "choices": []}
     if stats['pop'] < 10: return "ending_extinction", {"text": "ENDING: SILENT EARTH\nPopulation collapsed below critical levels.", "choices": []}
@@ -357,22 +579,17 @@ def get_next_event(stats, used_events, forced_next):
 
     # 3. HANDLE MUTATION ARC LOGIC
     if stats.get('mutated_strain_active'):
-        # Get all mutation keys (mut_p1 to mut_p20)
-        mut_keys = [k for k in MUTATION_ARC.keys() if k.startswith("mut_p")]
-        
-        # Count how many we have played THIS RUN
-        played_in_arc = [k for k in used_events if k in mut_keys]
-        
+        # Count how many mutation events (mut_p1 to mut_p20) we have played THIS RUN
+        played_in_arc = used_events.count_played(MUT_KEYS) if isinstance(used_events, GameState) else sum(1 for k in MUT_KEYS if k in used_events)
+
         # ARC LENGTH CHECK: Trigger Finale after 8 events
-        if len(played_in_arc) >= 8:
+        if played_in_arc >= 8:
             stats['mutated_strain_active'] = False
             return "mut_finale_win", MUTATION_ARC["mut_finale_win"]
-        
+
         # Pick a random mutation event that hasn't been played yet
-        available_muts = [k for k in mut_keys if k not in used_events]
-        
-        if available_muts:
-            eid = random.choice(available_muts)
+        eid = pick_unused(MUT_KEYS, used_events, rng)
+        if eid:
             return eid, MUTATION_ARC[eid]
         else:
             # Fallback if we somehow run out of mutation events
@@ -380,7 +597,7 @@ def get_next_event(stats, used_events, forced_next):
 
     # 4. TRIGGER MUTATION ARC START
     # Can only happen after Day 15, if not played yet, 30% chance per turn
-    if stats['day'] > 15 and "mut_start" not in used_events and random.random() < 0.3:
+    if stats['day'] > 15 and "mut_start" not in used_events and rng.random() < 0.3:
         return "mut_start", MUTATION_ARC["mut_start"]
 
     # 5. MAIN STORY EVENTS (Fixed Days)
@@ -388,101 +605,365 @@ def get_next_event(stats, used_events, forced_next):
     if day in STORY_ARCS: return f"day_{day}", STORY_ARCS[day]
 
     # 6. RANDOM POOL LOGIC (Strict No Repetition)
-    # Get all events that have NOT been used yet
-    all_available = [k for k in RANDOM_POOL.keys() if k not in used_events]
-    
     # FILTER: If Day <= 18, BLOCK procedural events (ids starting with 'proc_')
-    if day <= 18:
-        filtered_available = [k for k in all_available if not k.startswith("proc_")]
-    else:
-        filtered_available = all_available
-
-    # SELECTION
-    if filtered_available: 
-        eid = random.choice(filtered_available)
-        return eid, RANDOM_POOL[eid]
-    
+    eid = pick_unused(HANDWRITTEN_KEYS if day <= 18 else RANDOM_KEYS, used_events, rng)
+
     # Fallback: If ran out of hand-written pre-18, allow procedural early
-    if all_available:
-        eid = random.choice(all_available)
+    if not eid and day <= 18:
+        eid = pick_unused(RANDOM_KEYS, used_events, rng)
+
+    if eid:
         return eid, RANDOM_POOL[eid]
 
     # Ultimate Fallback (Should never happen with 150+ events)
     return "quiet_day", {"text": "STATUS: QUIET DAY\nNo major incidents reported.", "choices": [{"text": "Rest.", "mods": {"trust": 1}}]}
+START_STATS = {"day": 1, "pop": 100, "trust": 70, "eco": 80, "inf": 5, "cure": 0}
+
+def new_game():
+    return dict(START_STATS), "day_1", STORY_ARCS[1]
+
+def play_turn(stats, played, last_event_id, choice_idx, sim_rng=None, event_rng=None, timer=NULL_TIMER, params=None, policy=None):
+    """One game turn: apply the chosen option's mods, simulate a day, draw the next event.
+
+    played is the set of used event ids; next_id is added to it. Shared by the
+    handler and the headless tools so they run exactly the same rules.
+    params: a SimParams to simulate with instead of SIM_PARAMS (offline tools);
+    policy: the game's pinned virus table instead of the live one.
+    Returns (new_stats, next_id, next_event, flavor).
+    """
+    prev = EVENT_CATALOG.get(last_event_id) if last_event_id else None
+
+    c_mods = {}; next_fixed = None
+    if prev and choice_idx is not None and 0 <= choice_idx < len(prev["choices"]):
+        sel = prev["choices"][choice_idx]
+        c_mods = sel.get("mods", {}); next_fixed = sel.get("next_fixed")
+    timer.mark("resolve")
+
+    new_stats, flavor = run_simulation(stats, c_mods, sim_rng, params, policy)
+    timer.mark("simulate")
+    next_id, next_event = get_next_event(new_stats, played, next_fixed, event_rng)
+    if next_id != "quiet_day": played.add(next_id)
+    timer.mark("next_event")
+    return new_stats, next_id, next_event, flavor
+
+class GaussRng:
+    # Lets run_simulation() take its .normal() noise draw from a stdlib Random
+    __slots__ = ("rng",)
+    def __init__(self, rng): self.rng = rng
+    def normal(self, mu, sigma): return self.rng.gauss(mu, sigma)
+
+def turn_rngs(seed, turn):
+    # Per-turn (sim, event) RNGs derived from the game seed: the server can
+    # rebuild a seeded game from its seed and choices alone. The stream is keyed
+    # with SEED_SECRET, so a client holding the seed can't run the game offline
+    # to foresee events and noise and search for the best run. One stdlib
+    # Random serves both (seeding it is ~4x cheaper than a numpy Generator).
+    rng = random.Random(int.from_bytes(hmac.digest(SEED_SECRET, f"{int(seed)}:{turn}".encode(), 'sha256'), 'little'))
+    return GaussRng(rng), rng
+
+# ==========================================
+# REPLAY LOG (seeded games, verifiable scores)
+# ==========================================
+# A game is its seed plus one byte per turn: the choice index, or NO_CHOICE.
+# It travels as base64 ("replay") and replay_game() rebuilds the exact game.
+NO_CHOICE = 255
+MAX_REPLAY_TURNS = 1000
+SCORE_KEYS = ("day", "pop", "trust", "cure")
+# Scores must come with a server-issued (signed) seed and a replay that
+# reproduces them. ALLOW_UNVERIFIED_SCORES=1 also accepts games started before
+# seeds were signed or replays existed; only for the migration window.
+ALLOW_UNVERIFIED_SCORES = os.environ.get('ALLOW_UNVERIFIED_SCORES') == '1'
+# Every instance must share the key. Falls back to the DB URI, which they all
+# share and which never leaves the server; without a DB nothing is scored.
+SEED_SECRET = (os.environ.get('SEED_SECRET') or os.environ.get('MONGODB_URI') or "").encode()
+
+def new_seed():
+    return secrets.randbits(32)
+
+def sign_seed(seed, brain=None):
+    # "seed_sig" issued with a new game: a client can't pick (or grind) its own
+    # seed, nor swap in another virus table
+    msg = f"{int(seed)}:{brain}" if brain else str(int(seed))
+    return hmac.new(SEED_SECRET, msg.encode(), hashlib.sha256).hexdigest()[:32]
+
+def decode_replay(replay):
+    return base64.urlsafe_b64decode(replay) if replay else b""
+
+def replay_byte(choice_idx):
+    return bytes([choice_idx if isinstance(choice_idx, int) and 0 <= choice_idx < NO_CHOICE else NO_CHOICE])
+
+def append_replay(replay, choice_idx):
+    return base64.urlsafe_b64encode(decode_replay(replay) + replay_byte(choice_idx)).decode()
+
+def replay_game(seed, log, brain=None):
+    """Re-run a seeded game from its choice log (and pinned brain code). Returns (stats, last_event_id)."""
+    policy = policy_from_code(brain) if brain else None
+    stats, event_id, event = new_game(); played = {event_id}
+    for turn, c in enumerate(log):
+        if not event["choices"]: raise ValueError("REPLAY RUNS PAST THE ENDING")
+        sim_rng, event_rng = turn_rngs(seed, turn)
+        stats, event_id, event, _ = play_turn(stats, played, event_id, None if c == NO_CHOICE else c, sim_rng, event_rng, policy=policy)
+    return stats, event_id
+
+def verify_game(seed, seed_sig, replay, claimed_stats, claimed_ending, brain=None):
+    # True if the seed (and brain code) are what this server issued (seed_sig
+    # None skips that check) and the log reproduces the claimed ending and
+    # every stat the score uses
+    try:
+        if seed_sig is not None and not hmac.compare_digest(sign_seed(seed, brain), str(seed_sig)): return False
+        log = decode_replay(replay)
+        if len(log) > MAX_REPLAY_TURNS: return False
+        stats, ending = replay_game(int(seed), log, brain)
+        return ending == claimed_ending and all(abs(stats[k] - claimed_stats[k]) < 1e-6 for k in SCORE_KEYS)
+    except Exception:
+        return False
+
+# ==========================================
+# GAME STATE (compact, one object per live game)
+# ==========================================
+class GameState:
+    """A game's state in fixed slots instead of nested dicts and id lists.
+
+    The five stats, day and the mutation flag are plain attributes; played
+    events are one int bitmask over EVENT_IDS; the replay log is raw bytes;
+    brain is the pinned virus table's code (seeded games).
+    It also serves as the played set for play_turn() (`in` and add()), so a
+    turn never builds a set of id strings. from_json()/to_doc() and the
+    stats()/used_bits()/replay() accessors convert at the handler and
+    session-store boundaries; the wire format is unchanged.
+    """
+    __slots__ = ("day", "pop", "trust", "eco", "inf", "cure", "mutated", "played", "last_event_id", "seed", "turn", "log", "brain")
+
+    def __init__(self, stats=START_STATS, played=0, last_event_id=None, seed=None, turn=0, log=b"", brain=None):
+        self.set_stats(stats)
+        self.played = played; self.last_event_id = last_event_id
+        self.seed = seed; self.turn = turn; self.log = log; self.brain = brain
+
+    @classmethod
+    def new(cls, seed=None):
+        stats, event_id, event = new_game()
+        return cls(stats, EVENT_INDEX_BIT[event_id], event_id, seed, brain=live_policy_code() if seed is not None else None), event
+
+    @classmethod
+    def from_json(cls, stats, used_events=None, used_bits=None, last_event_id=None, seed=None, replay="", brain=None):
+        played = b64_to_bits(used_bits) if used_bits is not None else ids_to_bits(used_events or ())
+        log = decode_replay(replay) if seed is not None else b""
+        if brain is not None: policy_from_code(brain)  # reject a malformed code up front
+        return cls(stats, played, last_event_id, seed, len(log), log, brain if seed is not None else None)
+
+    @classmethod
+    def from_doc(cls, doc):
+        return cls.from_json(doc["stats"], doc.get("used_events"), doc.get("used_bits"), doc["last_event_id"], doc["seed"], doc.get("replay", ""), doc.get("brain"))
+
+    def to_doc(self):
+        return {"stats": self.stats(), "used_bits": self.used_bits(), "last_event_id": self.last_event_id, "seed": self.seed, "turn": self.turn, "replay": self.replay(), "brain": self.brain}
+
+    def copy(self):
+        return GameState(self, self.played, self.last_event_id, self.seed, self.turn, self.log, self.brain)
+
+    # --- stats dict (JSON shape) ---
+    def stats(self):
+        s = {"day": self.day, "pop": self.pop, "trust": self.trust, "eco": self.eco, "inf": self.inf, "cure": self.cure}
+        if self.mutated: s['mutated_strain_active'] = True
+        return s
+
+    def set_stats(self, s):
+        if isinstance(s, GameState):
+            self.day, self.pop, self.trust, self.eco, self.inf, self.cure, self.mutated = s.day, s.pop, s.trust, s.eco, s.inf, s.cure, s.mutated
+            return
+        self.day = s.get('day', 1); self.pop = s['pop']; self.trust = s['trust']; self.eco = s['eco']; self.inf = s['inf']
+        self.cure = s.get('cure', 0); self.mutated = bool(s.get('mutated_strain_active'))
+
+    # --- played set ---
+    def __contains__(self, event_id):
+        return self.played & EVENT_INDEX_BIT.get(event_id, 0) != 0
+
+    def add(self, event_id):
+        self.played |= EVENT_INDEX_BIT.get(event_id, 0)
+
+    def count_played(self, pool):
+        return bin(self.played & pool.mask).count("1")
+
+    def unplayed(self, pool):
+        # Same list (and order) as filtering the pool by `not in`, but walks
+        # only the free bits: the pools are in bit order
+        free = pool.mask & ~self.played; out = []
+        while free:
+            low = free & -free; out.append(EVENT_IDS[low.bit_length() - 1]); free ^= low
+        return out
+
+    def used_bits(self):
+        return bits_to_b64(self.played)
+
+    def used_events(self):
+        return bits_to_ids(self.played)
+
+    def replay(self):
+        return base64.urlsafe_b64encode(self.log).decode()
+
+    @property
+    def ending(self):
+        return self.last_event_id if self.last_event_id and self.last_event_id.startswith("ending_") else None
+
+    def advance(self, choice_idx, timer=NULL_TIMER):
+        """Play one turn in place. Returns (next_event, flavor); the id is in last_event_id."""
+        sim_rng, event_rng = turn_rngs(self.seed, self.turn) if self.seed is not None else (None, None)
+        policy = policy_from_code(self.brain) if self.brain else None
+        new_stats, next_id, next_event, flavor = play_turn(self.stats(), self, self.last_event_id, choice_idx, sim_rng, event_rng, timer, policy=policy)
+        self.set_stats(new_stats); self.last_event_id = next_id; self.turn += 1
+        if self.seed is not None: self.log += replay_byte(choice_idx)
+        return next_event, flavor
+
+# ==========================================
+# SESSIONS (server-authoritative state, opt-in per request)
+# ==========================================
+# SESSION_STORE=mongo writes sessions through to MongoDB so any instance can
+# serve them; the default keeps them in this process only.
+SESSION_TTL = 3600
+SESSIONS = SessionCache(
+    MongoSessionStore(lambda: db['sessions'] if get_db() is not None else None, SESSION_TTL, GameState.to_doc, GameState.from_doc) if os.environ.get('SESSION_STORE') == 'mongo' else None,
+    ttl=SESSION_TTL)
+# Set (to the error message) by hosts where in-process sessions can't work,
+# e.g. scripts/serve.py --workers N without a store: each worker has its own cache
+SESSIONS_UNAVAILABLE = None
+
+def start_session():
+    if SESSIONS_UNAVAILABLE: raise ValueError(SESSIONS_UNAVAILABLE)
+    state, next_event = GameState.new(new_seed())
+    return SESSIONS.create(state), state, next_event
+
+def advance_session(session_id, choice_idx, timer=NULL_TIMER):
+    """Play one turn of a session. Returns (event id the choice answered, new state, next_event, flavor)."""
+    state = SESSIONS.get(session_id)
+    for attempt in range(2):
+        if state is None: raise ValueError("SESSION EXPIRED")
+        if state.ending: raise ValueError("GAME OVER")
+        new_state = state.copy()  # the cached state stays intact if the save loses a race
+        next_event, flavor = new_state.advance(choice_idx, timer)
+        if SESSIONS.save(session_id, new_state, state.turn): break
+        # With a store, a lost save usually means this instance's cached copy
+        # was stale (another instance served the last turn): reload, play once more
+        if SESSIONS.store is None or attempt: raise ValueError("SESSION CONFLICT")
+        state = SESSIONS.get(session_id, fresh=True)
+    if choice_idx is not None and db_configured(): CHOICE_ANALYTICS.record(state.last_event_id, choice_idx)
+    return state.last_event_id, new_state, next_event, flavor
+
 # ==========================================
 # 4. HANDLER (FINAL)
 # ==========================================
+# Opt-in per-stage timing (see _timing.py): TURN_TIMING=header|log|1
+TIMING_HEADER, TIMING_LOG = timing_mode(os.environ.get('TURN_TIMING'))
+
 class handler(BaseHTTPRequestHandler):
     def do_POST(self):
+        timer = self.timer = StageTimer() if TIMING_HEADER or TIMING_LOG else NULL_TIMER
+        action = "turn"; self.streaming = False
         try:
             l = int(self.headers.get('Content-Length', 0))
-            data = json.loads(self.rfile.read(l))
-            
+            data = loads(self.rfile.read(l))
+            action = data.get('action') or "turn"
+            timer.mark("parse")
+
             # --- LEADERBOARD ---
             if data.get('action') == 'get_leaderboard':
-                if DB_STATUS == "ONLINE" and leaderboard_col is not None:
-                    try:
-                        scores = list(leaderboard_col.find({}, {'_id': 0}).sort("score", -1).limit(10))
-                        self.send_json({"leaderboard": scores})
-                    except:
-                        self.send_json({"leaderboard": []})
-                else:
-                    self.send_json({"leaderboard": []})
+                board = LEADERBOARD.top()
+                timer.mark("leaderboard")
+                self.send_json({"leaderboard": board})
                 return
 
             # --- SUBMIT SCORE ---
             if data.get('action') == 'submit_score':
                 uid = data.get('user_id'); name = data.get('name'); s = data.get('stats'); ending = data.get('ending')
-                if DB_STATUS == "ONLINE" and leaderboard_col is not None and uid:
+                if data.get('session_id'):
+                    # Session games are scored from the server's own state, never the client's
+                    state = SESSIONS.get(data['session_id'])
+                    if not state or not state.ending:
+                        self.send_json({"status": "rejected"}); return
+                    s = state.stats(); ending = state.ending
+                elif 'seed' in data and 'replay' in data:
+                    # Stateless games: a signed seed, and the replay must reproduce the claimed result
+                    seed_sig = data.get('seed_sig')
+                    if seed_sig is None and not ALLOW_UNVERIFIED_SCORES: seed_sig = ""  # unsigned: fails the check
+                    if not verify_game(data['seed'], seed_sig, data['replay'], s, ending, data.get('brain')):
+                        self.send_json({"status": "rejected"}); return
+                elif not ALLOW_UNVERIFIED_SCORES:
+                    self.send_json({"status": "rejected"}); return
+                if uid and get_db() is not None:
                     score = calculate_score(s, ending)
-                    exist = leaderboard_col.find_one({"user_id": uid})
-                    if not exist or score > exist['score']:
-                        leaderboard_col.update_one({"user_id": uid}, {"$set": {"name": name, "score": score, "days": s['day'], "ending": ending}}, upsert=True)
+                    LEADERBOARD.submit({"user_id": uid, "name": name, "score": score, "days": s['day'], "ending": ending})
+                    timer.mark("submit")
                     self.send_json({"status": "saved", "score": score})
                 else:
                     self.send_json({"status": "offline"})
                 return
 
             # --- GAME TURN ---
+            # Session mode: {"is_init": true, "session": true} then {"session_id", "choice_index"}
+            session_id = data.get('session_id')
+            session_mode = bool(session_id) or bool(data.get('session'))
             stats = data.get('stats', {})
             choice_idx = data.get('choice_index')
             last_event_id = data.get('last_event_id')
-            used_events = data.get('used_events', [])
+            # Bitset protocol if the client sends 'used_bits', legacy id list otherwise
+            bits_mode = 'used_bits' in data
+            used_events = None if bits_mode else data.get('used_events', [])
             is_init = data.get('is_init', False)
+            # Seeded, replayable game if the client carries 'seed' + 'replay' (new games always get one)
+            seed = new_seed() if is_init else data.get('seed')
+            # Every mode plays on a GameState; JSON is converted only here and when responding
+            if not (session_mode or is_init):
+                state = GameState.from_json(stats, used_events, data.get('used_bits'), last_event_id, seed, data.get('replay', ""), data.get('brain'))
+            timer.mark("decode")
 
-            # GLOBAL INTEL (TRACKING ONLY - SILENT)
-            # We removed the 'global_msg' string logic so it never shows in text.
-            if DB_STATUS == "ONLINE" and not is_init and global_choices is not None and last_event_id and choice_idx is not None:
-                try:
-                    k = f"{last_event_id}_{choice_idx}"; tk = f"{last_event_id}_total"
-                    global_choices.update_one({"_id": k}, {"$inc": {"count": 1}}, upsert=True)
-                    global_choices.update_one({"_id": tk}, {"$inc": {"count": 1}}, upsert=True)
-                except: pass
-
-            if is_init:
-                new_stats = {"day": 1, "pop": 100, "trust": 70, "eco": 80, "inf": 5, "cure": 0}
-                next_id = "day_1"; next_event = STORY_ARCS[1]; used_events = ["day_1"]; flavor = ""
+            # GLOBAL INTEL: the choice is counted here and reported back as a
+            # "choice_share" (percent) from the in-memory snapshot, never a per-turn DB read.
+            # Sessions count it in advance_session(), from the server's state, once the turn is saved.
+            if not (session_mode or is_init) and last_event_id and choice_idx is not None and db_configured():
+                CHOICE_ANALYTICS.record(last_event_id, choice_idx)
+            timer.mark("track")
+
+            if session_mode:
+                if is_init: session_id, state, next_event = start_session(); flavor = ""
+                else:
+                    last_event_id, state, next_event, flavor = advance_session(session_id, choice_idx, timer)
+            elif is_init:
+                state, next_event = GameState.new(seed); used_events = ["day_1"]; flavor = ""
             else:
-                prev = None
-                if last_event_id:
-                    if last_event_id.startswith("day_"): prev = STORY_ARCS.get(int(last_event_id.split("_")[1]))
-                    elif last_event_id in MUTATION_ARC: prev = MUTATION_ARC[last_event_id]
-                    elif last_event_id in RANDOM_POOL: prev = RANDOM_POOL[last_event_id]
-                
-                c_mods = {}; next_fixed = None
-                if prev and choice_idx is not None and 0 <= choice_idx < len(prev["choices"]):
-                    sel = prev["choices"][choice_idx]
-                    c_mods = sel.get("mods", {}); next_fixed = sel.get("next_fixed")
-                
-                new_stats, flavor = run_simulation(stats, c_mods)
-                next_id, next_event = get_next_event(new_stats, used_events, next_fixed)
-                if next_id != "quiet_day": used_events.append(next_id)
-
-            text = next_event["text"]
+                next_event, flavor = state.advance(choice_idx, timer)
+                if used_events is not None and state.last_event_id != "quiet_day": used_events.append(state.last_event_id)
+            next_id = state.last_event_id; new_stats = state.stats()
+
             # REMOVED: if global_msg: text += global_msg
-            if flavor: text += f"\n\n[AI ANALYSIS]: {flavor}"
+            analysis = f"\n\n[AI ANALYSIS]: {flavor}" if flavor else ""
 
-            self.send_json({"stats": new_stats, "narrative": text, "choices": next_event["choices"], "event_id": next_id, "used_events": used_events})
+            # Catalog events reuse their cached encoded text/choices; endings are encoded fresh
+            text_bytes, choices_bytes = EVENT_PAYLOADS.get(next_id) or (None, None)
+            carry = {}  # what the client sends back next turn
+            if session_mode: carry["session_id"] = session_id
+            elif bits_mode: carry["used_bits"] = state.used_bits()
+            else: carry["used_events"] = used_events
+            if not session_mode and seed is not None:
+                carry["seed"] = seed; carry["replay"] = state.replay()
+                if state.brain: carry["brain"] = state.brain
+            if is_init and not session_mode: carry["seed_sig"] = sign_seed(seed, state.brain)
+            share = None if is_init else INTEL.choice_share(last_event_id, choice_idx)
+
+            if data.get('stream'):
+                self.stream_turn(new_stats, next_id, next_event, analysis, choices_bytes, carry, share)
+                timer.mark("stream")
+            else:
+                resp = {"stats": new_stats, "event_id": next_id}; raw = {}
+                if analysis or text_bytes is None: resp["narrative"] = next_event["text"] + analysis
+                else: raw["narrative"] = text_bytes
+                if choices_bytes is None: resp["choices"] = next_event["choices"]
+                else: raw["choices"] = choices_bytes
+                if share is not None: resp["choice_share"] = share
+                resp.update(carry)
+                timer.mark("build")
+                self.send_json(resp, raw)
+            # Cheap checks, run AFTER the response has been written
+            CHOICE_ANALYTICS.maybe_flush()
+            timer.mark("flush")
 
         except Exception as e:
             err_response = {
@@ -492,7 +973,61 @@ class handler(BaseHTTPRequestHandler):
                 "event_id": "error",
                 "used_events": []
             }
-            self.send_response(200); self.send_header("Content-Type", "application/json"); self.end_headers(); self.wfile.write(json.dumps(err_response).encode())
+            if self.streaming: self.send_event("error", err_response); self.end_stream()
+            else: self.send_json(err_response)
+            action = "error"
+        finally:
+            if TIMING_LOG: timer.log(action=action)
+
+    def send_json(self, d, raw=None):
+        # Content-Length lets the client finish reading before post-response work (analytics flush) ends
+        timer = getattr(self, 'timer', NULL_TIMER)
+        body = dumps(d, raw)
+        timer.mark("encode")
+        self.send_response(200); self.send_header("Content-Type", "application/json"); self.send_header("Content-Length", str(len(body)))
+        if TIMING_HEADER: self.send_header("Server-Timing", timer.server_timing())
+        self.end_headers(); self.wfile.write(body)
+        timer.mark("write")
+
+    # --- STREAMED TURNS ---
+    # {"stream": true} on a game turn answers with server-sent events instead of
+    # one JSON body, so the typewriter can start on the first line while the
+    # rest is still on the wire:
+    #   event: turn       {"event_id", "stats", "narrative": first line, "analysis"?, "choice_share"?}
+    #   event: narrative  {"text": rest of the narrative}          (multi-line events only)
+    #   event: done       {"choices", session_id | used_bits | used_events, seed?, seed_sig?, brain?, replay?}
+    # turn.narrative + narrative.text + turn.analysis is the one-shot "narrative".
+    # Errors before the stream starts come back as the usual JSON error body;
+    # a failure after the headers went out arrives as "event: error".
+    def stream_turn(self, stats, event_id, event, analysis, choices_bytes, carry, share=None):
+        first, nl, rest = event["text"].partition("\n")
+        self.start_stream()
+        head = {"event_id": event_id, "stats": stats, "narrative": first}
+        if analysis: head["analysis"] = analysis
+        if share is not None: head["choice_share"] = share
+        self.send_event("turn", head)
+        if rest: self.send_event("narrative", {"text": nl + rest})
+        if choices_bytes is None: self.send_event("done", dict(carry, choices=event["choices"]))
+        else: self.send_event("done", carry, {"choices": choices_bytes})
+        self.end_stream()
+
+    def start_stream(self):
+        # Chunked on HTTP/1.1 keep-alive connections (serve.py); otherwise the
+        # stream ends when the connection closes.
+        self.streaming = True
+        self.chunked = self.request_version == "HTTP/1.1" and self.protocol_version == "HTTP/1.1"
+        self.send_response(200); self.send_header("Content-Type", "text/event-stream"); self.send_header("Cache-Control", "no-cache")
+        self.send_header("X-Accel-Buffering", "no")  # nginx and similar proxies: don't hold frames back
+        if self.chunked: self.send_header("Transfer-Encoding", "chunked")
+        else: self.send_header("Connection", "close"); self.close_connection = True
+        if TIMING_HEADER: self.send_header("Server-Timing", self.timer.server_timing())
+        self.end_headers()
+
+    def send_event(self, name, d, raw=None):
+        frame = b"event: " + name.encode() + b"\ndata: " + dumps(d, raw) + b"\n\n"
+        if self.chunked: frame = b"%x\r\n%s\r\n" % (len(frame), frame)
+        self.wfile.write(frame)
 
-    def send_json(self, d):
-        self.send_response(200); self.send_header("Content-Type", "application/json"); self.end_headers(); self.wfile.write(json.dumps(d).encode())
+    def end_stream(self):
+        if self.chunked: self.wfile.write(b"0\r\n\r\n")
+        self.streaming = False
@@ -1,6 +1,12 @@
 /** @type {import('next').NextConfig} */
 const nextConfig = {
   reactStrictMode: true,
+  // Self-hosting: proxy /api/* to the standalone Python server (scripts/serve.py)
+  async rewrites() {
+    return process.env.API_URL
+      ? [{ source: '/api/:path*', destination: `${process.env.API_URL}/api/:path*` }]
+      : []
+  },
 }
 
 module.exports = nextConfig
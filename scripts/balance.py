@@ -0,0 +1,113 @@
+"""Headless balance analysis.
+
+Plays N complete games through the real turn logic (simulate.play_turn) with a
+scripted choice policy, spread over a process pool, and reports:
+  - ending distribution (victory / extinction / revolution / collapse)
+  - game length (days) and calculate_score() distributions
+  - per-event, per-choice pick counts and win rates (to --out, CSV or NPZ)
+
+    python scripts/balance.py -n 20000 --policy random
+    python scripts/balance.py -n 5000 --policy greedy:trust --out choices.csv
+    python scripts/balance.py --policy always:2 --brain virus_brain.json --out choices.npz
+
+Policies:
+  random          uniform over the offered choices
+  greedy:<stat>   choice with the largest immediate mod on <stat> (greedy:-inf minimizes)
+  always:<k>      always choice k (clamped to the number of choices)
+"""
+import argparse
+import csv
+import os
+import sys
+from collections import Counter, defaultdict
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'api'))
+
+from simulate import calculate_score, new_game, play_turn
+from _batch import game_rngs, init_worker, make_policy
+
+ENDINGS = ("ending_victory", "ending_extinction", "ending_revolution", "ending_collapse", "timeout")
+
+# ==========================================
+# HEADLESS GAME LOOP
+# ==========================================
+def play_game(policy, seed, max_days=365):
+    sim_rng, event_rng, choice_rng = game_rngs(seed)
+    stats, event_id, event = new_game(); played = {event_id}
+    picks = []
+    while event["choices"]:
+        if stats['day'] >= max_days:
+            event_id = "timeout"; break
+        idx = policy(event, choice_rng)
+        picks.append((event_id, idx))
+        stats, event_id, event, _ = play_turn(stats, played, event_id, idx, sim_rng, event_rng)
+    return {"ending": event_id, "days": stats['day'], "score": calculate_score(stats, event_id), "picks": picks}
+
+def _run_chunk(args):
+    spec, seeds, max_days = args
+    policy = make_policy(spec)
+    return [play_game(policy, s, max_days) for s in seeds]
+
+def run_games(spec, n, seed=0, workers=None, max_days=365, brain_path=None, chunk=250):
+    chunks = [(spec, range(seed + i, seed + min(i + chunk, n)), max_days) for i in range(0, n, chunk)]
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker, initargs=(brain_path,)) as pool:
+        return [g for part in pool.map(_run_chunk, chunks) for g in part]
+
+# ==========================================
+# REPORTING
+# ==========================================
+def choice_table(games):
+    # (event_id, choice) -> picks, wins, score sum; a "win" is a game that ended in victory
+    rows = defaultdict(lambda: [0, 0, 0])
+    for g in games:
+        won = g["ending"] == "ending_victory"
+        for key in set(g["picks"]):
+            r = rows[key]; r[0] += 1; r[1] += won; r[2] += g["score"]
+    return [(eid, c, p, w, w / p, s / p) for (eid, c), (p, w, s) in sorted(rows.items())]
+
+COLUMNS = ("event_id", "choice", "games", "wins", "win_rate", "mean_score")
+
+def write_table(rows, path):
+    if path.endswith(".npz"):
+        cols = list(zip(*rows)) if rows else [()] * len(COLUMNS)
+        np.savez_compressed(path, **{name: np.asarray(col) for name, col in zip(COLUMNS, cols)})
+    else:
+        with open(path, 'w', newline='') as f:
+            w = csv.writer(f); w.writerow(COLUMNS)
+            w.writerows((eid, c, p, wins, f"{rate:.4f}", f"{ms:.1f}") for eid, c, p, wins, rate, ms in rows)
+
+def _dist(label, values):
+    v = np.asarray(values)
+    p10, p50, p90 = np.percentile(v, [10, 50, 90])
+    return f"{label:<8} mean {v.mean():8.1f}  p10 {p10:8.1f}  p50 {p50:8.1f}  p90 {p90:8.1f}  max {v.max():8.1f}"
+
+def report(games, spec):
+    n = len(games)
+    endings = Counter(g["ending"] for g in games)
+    lines = [f"POLICY {spec} -- {n} games", "", "ENDINGS"]
+    lines += [f"  {e:<20} {endings[e]:7d}  {100.0 * endings[e] / n:5.1f}%" for e in ENDINGS if endings[e]]
+    lines += ["", _dist("days", [g["days"] for g in games]), _dist("score", [g["score"] for g in games])]
+    return "\n".join(lines)
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("-n", "--games", type=int, default=10000)
+    ap.add_argument("--policy", default="random")
+    ap.add_argument("--seed", type=int, default=0, help="game i uses seed + i")
+    ap.add_argument("--workers", type=int, default=None, help="process pool size (default: all cores)")
+    ap.add_argument("--max-days", type=int, default=365, help="stop games that run longer (reported as timeout)")
+    ap.add_argument("--brain", help="virus policy JSON to evaluate instead of the deployed one")
+    ap.add_argument("--out", help="per-event choice table, .csv or .npz")
+    args = ap.parse_args()
+
+    make_policy(args.policy)  # fail fast on a bad spec
+    games = run_games(args.policy, args.games, args.seed, args.workers, args.max_days, args.brain)
+    print(report(games, args.policy))
+    if args.out:
+        rows = choice_table(games)
+        write_table(rows, args.out)
+        print(f"\nWrote {len(rows)} event/choice rows to {args.out}")
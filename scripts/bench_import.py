@@ -0,0 +1,42 @@
+"""Cold-start benchmark: wall time of a fresh `import simulate`.
+
+Each run is a new interpreter, like a serverless cold start. By default
+MONGODB_URI points at an unroutable host, which is the worst case for an
+import that pings the DB (the old module blocked ~3s here).
+
+    python scripts/bench_import.py            # 10 runs, unreachable DB
+    python scripts/bench_import.py -n 20 --uri mongodb://localhost:27017
+    python scripts/bench_import.py --no-uri   # no MONGODB_URI at all
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+API_DIR = os.path.join(ROOT, 'api')
+
+PROBE = (
+    "import sys, time; sys.path.insert(0, %r); t = time.perf_counter(); import simulate; "
+    "print(time.perf_counter() - t)" % API_DIR
+)
+
+def time_import(env):
+    out = subprocess.run([sys.executable, "-c", PROBE], env=env, cwd=ROOT, capture_output=True, text=True, check=True)
+    return float(out.stdout.strip().splitlines()[-1])
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("-n", type=int, default=10, help="number of cold imports")
+    ap.add_argument("--uri", default="mongodb://10.255.255.1:27017", help="MONGODB_URI for the child process")
+    ap.add_argument("--no-uri", action="store_true", help="run without MONGODB_URI")
+    args = ap.parse_args()
+
+    env = dict(os.environ)
+    env.pop('MONGODB_URI', None)
+    if not args.no_uri: env['MONGODB_URI'] = args.uri
+
+    times = sorted(time_import(env) for _ in range(args.n))
+    print(f"import simulate x{args.n}: median {statistics.median(times) * 1000:.1f} ms, "
+          f"min {times[0] * 1000:.1f} ms, max {times[-1] * 1000:.1f} ms")
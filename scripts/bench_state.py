@@ -0,0 +1,73 @@
+"""Memory benchmark: live game sessions as dicts vs GameState.
+
+Plays a pool of seeded games to random mid-game turns, then decodes N
+sessions from them (default 100k, each with its own objects, as live
+sessions would be) into each form and measures the heap with tracemalloc:
+
+  dict       the previous session shape: {"stats": {...}, "used_events": [...],
+             "last_event_id", "seed", "turn", "replay": base64 str, "ending"}
+  GameState  __slots__ object: stats as attributes, played-event bitmask, raw
+             replay bytes
+
+    python scripts/bench_state.py
+    python scripts/bench_state.py -n 250000 --turns 60
+"""
+import argparse
+import gc
+import json
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'api'))
+
+from simulate import GameState, b64_to_bits, bits_to_ids
+
+def play_pool(size, max_turns, rng):
+    # JSON documents (GameState.to_doc), so every session decodes to its own objects
+    pool = []
+    while len(pool) < size:
+        state, event = GameState.new(rng.getrandbits(32))
+        for _ in range(rng.randint(1, max_turns)):
+            if not event["choices"]: break
+            event, _ = state.advance(rng.randrange(len(event["choices"])))
+        pool.append(json.dumps(state.to_doc()))
+    return pool
+
+def as_dict(doc):
+    doc = json.loads(doc)
+    # ids shared with the catalog, as when the list was built from next_id turn by turn
+    used = bits_to_ids(b64_to_bits(doc.pop("used_bits")))
+    return dict(doc, used_events=used, ending=doc["last_event_id"] if doc["last_event_id"].startswith("ending_") else None)
+
+def as_state(doc):
+    return GameState.from_doc(json.loads(doc))
+
+def measure(build, pool, n):
+    gc.collect(); tracemalloc.start()
+    t = time.perf_counter()
+    live = [build(pool[i % len(pool)]) for i in range(n)]
+    dt = time.perf_counter() - t
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del live
+    return size, dt
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("-n", "--sessions", type=int, default=100_000)
+    ap.add_argument("--turns", type=int, default=40, help="games stop after a random 1..TURNS turns")
+    ap.add_argument("--pool", type=int, default=2000, help="distinct games to copy from")
+    args = ap.parse_args()
+
+    pool = play_pool(args.pool, args.turns, random.Random(0))
+    avg_used = sum(bin(GameState.from_doc(json.loads(d)).played).count("1") for d in pool) / len(pool)
+    print(f"{args.sessions:,} sessions, {avg_used:.1f} played events on average")
+    base = None
+    for name, build in (("dict", as_dict), ("GameState", as_state)):
+        size, dt = measure(build, pool, args.sessions)
+        base = base or size
+        print(f"  {name:<10} {size / 2**20:8.1f} MiB  {size / args.sessions:6.0f} B/session  ({base / size:.1f}x)  built in {dt:.2f}s")
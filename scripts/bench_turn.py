@@ -0,0 +1,131 @@
+"""Turn-latency benchmark for handler.do_POST, broken down per stage.
+
+Drives the real handler in-process (no sockets) with TURN_TIMING on and the
+database replaced by scripts/fakedb.py, then reports p50/p99 per stage for:
+
+  init           new game
+  mid_legacy     day-40 turn, 150 used events sent as an id list
+  mid_bits       the same turn using the used_bits protocol
+  mid_stream     mid_bits as a streamed (server-sent events) response
+  mutation       turn inside the mutation arc
+  leaderboard    get_leaderboard, cache warm
+  leaderboard_cold  get_leaderboard with the cache invalidated every call
+  submit         submit_score of a finished seeded game (signed seed, replay verified)
+
+    python scripts/bench_turn.py
+    python scripts/bench_turn.py -n 5000 --json bench/turn-$(git rev-parse --short HEAD).json
+
+Everything is seeded, so runs are comparable across releases.
+"""
+import argparse
+import io
+import json
+import os
+import platform
+import random
+import sys
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'api'))
+os.environ.setdefault('MONGODB_URI', 'fake://in-process')
+
+import simulate
+import fakedb
+
+
+class BenchHandler(simulate.handler):
+    """handler without a socket: request body in, response bytes out."""
+    def __init__(self, body):
+        self.rfile = io.BytesIO(body); self.wfile = io.BytesIO()
+        self.headers = {'Content-Length': str(len(body))}
+        self.request_version = 'HTTP/1.1'; self.command = 'POST'; self.requestline = 'POST /api/simulate HTTP/1.1'
+        self.client_address = ('127.0.0.1', 0)
+
+    def log_message(self, *args):
+        pass
+
+
+def mid_game_request(bits):
+    rng = random.Random(7)
+    used = ["day_1", "day_5"] + rng.sample(simulate.RANDOM_KEYS, 148)
+    last = used[-1]
+    req = {"stats": {"day": 40, "pop": 80, "trust": 60, "eco": 60, "inf": 20, "cure": 30}, "choice_index": 1, "last_event_id": last}
+    if bits: req["used_bits"] = simulate.encode_used(used)
+    else: req["used_events"] = used
+    return req
+
+def mutation_request():
+    used = ["day_1", "day_5", "mut_start", "mut_strategy_focus"] + list(simulate.MUT_KEYS[:4]) + list(simulate.RANDOM_KEYS[:30])
+    stats = {"day": 30, "pop": 75, "trust": 55, "eco": 55, "inf": 30, "cure": 40, "mutated_strain_active": True}
+    return {"stats": stats, "choice_index": 0, "last_event_id": simulate.MUT_KEYS[3], "used_events": used}
+
+def verified_submission():
+    rng = random.Random(3)
+    state, event = simulate.GameState.new(12345)
+    while event["choices"]: event, _ = state.advance(rng.randrange(len(event["choices"])))
+    return {"action": "submit_score", "user_id": "bench", "name": "BENCH", "stats": state.stats(), "ending": state.ending,
+            "seed": state.seed, "seed_sig": simulate.sign_seed(state.seed, state.brain), "brain": state.brain, "replay": state.replay()}
+
+def scenarios():
+    submit = verified_submission()
+    return {
+        "init": ({"is_init": True, "used_bits": ""}, None),
+        "mid_legacy": (mid_game_request(bits=False), None),
+        "mid_bits": (mid_game_request(bits=True), None),
+        "mid_stream": (dict(mid_game_request(bits=True), stream=True), None),
+        "mutation": (mutation_request(), None),
+        "leaderboard": ({"action": "get_leaderboard"}, None),
+        "leaderboard_cold": ({"action": "get_leaderboard"}, simulate.LEADERBOARD.invalidate),
+        "submit": (submit, None),
+    }
+
+def seed_leaderboard(n=500):
+    rng = random.Random(1)
+    for i in range(n):
+        simulate.LEADERBOARD.submit({"user_id": f"u{i}", "name": f"P{i}", "score": rng.randrange(20000), "days": 30, "ending": "ending_collapse"})
+
+def run(req, iterations, warmup, before=None):
+    body = json.dumps(req).encode()
+    stages = {}; totals = []
+    for i in range(warmup + iterations):
+        if before: before()
+        h = BenchHandler(body); h.do_POST()
+        if i < warmup: continue
+        for name, sec in h.timer.stages: stages.setdefault(name, []).append(sec)
+        totals.append(h.timer.total())
+    order = list(stages)  # stage order as first seen
+    pct = lambda v: {"p50_us": float(np.percentile(v, 50) * 1e6), "p99_us": float(np.percentile(v, 99) * 1e6)}
+    return {"total": pct(totals), "stages": {name: pct(stages[name]) for name in order}, "response_bytes": len(h.wfile.getvalue())}
+
+def print_result(name, r):
+    print(f"{name:<17} total  p50 {r['total']['p50_us']:9.1f}us  p99 {r['total']['p99_us']:9.1f}us   ({r['response_bytes']} B)")
+    for stage, v in r["stages"].items():
+        print(f"    {stage:<13} p50 {v['p50_us']:9.1f}us  p99 {v['p99_us']:9.1f}us")
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("-n", "--iterations", type=int, default=2000)
+    ap.add_argument("--warmup", type=int, default=200)
+    ap.add_argument("--only", help="comma-separated scenario names")
+    ap.add_argument("--json", help="also write results to this file")
+    args = ap.parse_args()
+
+    simulate.TIMING_HEADER, simulate.TIMING_LOG = True, False
+    simulate.CHOICE_ANALYTICS.background = False
+    fakedb.install(simulate)
+    seed_leaderboard()
+    random.seed(0); np.random.seed(0)
+
+    results = {}
+    for name, (req, before) in scenarios().items():
+        if args.only and name not in args.only.split(","): continue
+        results[name] = run(req, args.iterations, args.warmup, before)
+        print_result(name, results[name])
+
+    if args.json:
+        meta = {"python": platform.python_version(), "numpy": np.__version__, "iterations": args.iterations}
+        with open(args.json, 'w') as f:
+            json.dump({"meta": meta, "results": results}, f, indent=1)
+        print(f"\nWrote {args.json}")
@@ -0,0 +1,21 @@
+"""Append new catalog events to event_index.json (the played-bitset table).
+
+Run from the repo root after adding events to the pools:
+    python scripts/build_event_index.py
+
+Existing ids never move (retired ones keep their slot), so bitsets held by
+live games stay valid across the deploy.
+"""
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'api'))
+
+from simulate import BITSET_VERSION, EVENT_CATALOG, EVENT_IDS, EVENT_INDEX_FILE
+
+if __name__ == "__main__":
+    retired = [eid for eid in EVENT_IDS if eid not in EVENT_CATALOG]
+    with open(EVENT_INDEX_FILE, 'w') as f:
+        json.dump({"version": BITSET_VERSION, "ids": list(EVENT_IDS)}, f, indent=0)
+    print(f"Wrote {len(EVENT_IDS)} ids ({len(retired)} retired) to {EVENT_INDEX_FILE}")
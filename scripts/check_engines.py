@@ -0,0 +1,93 @@
+"""Regression checks for the game engines. Exits non-zero on any mismatch.
+
+  batch    _batch.run_simulation_batch() gives every game exactly the numbers
+           run_simulation() gives it on the same seeded noise stream, with the
+           default SimParams and with a modified set
+  replay   seeded games played turn by turn (GameState.advance) are rebuilt
+           exactly by replay_game(); verify_game() accepts them with their
+           seed_sig and rejects tampered stats or a forged signature, and
+           still accepts them after a different virus brain goes live
+
+Run after touching run_simulation(), _batch.py, SimParams or the turn logic:
+    python scripts/check_engines.py
+"""
+import json
+import os
+import random
+import sys
+import tempfile
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'api'))
+
+import simulate
+from simulate import GameState, SimParams, decode_replay, replay_game, run_simulation, sign_seed, verify_game
+from _batch import STAT_KEYS, new_batch, noise_streams, run_simulation_batch, unpack
+
+MODIFIED = SimParams(r0_base=1.8, r0_aggressive=3.1, compliance_factor=0.3, cure_threshold=15, cure_coef=0.25,
+                     mortality_add_2=2.5, hospital_base=35, collapse_mortality=3.0, eco_decay=0.3, noise_sd=2.0)
+
+def check_batch(params=None, games=300, days=60, seed=0):
+    """Mismatching games after `days` days of random mods, batch vs scalar."""
+    rng = random.Random(seed)
+    mods = [{k: rng.randint(-10, 10) for k in STAT_KEYS} for _ in range(days)]
+    noise = noise_streams([np.random.default_rng(seed + i) for i in range(games)], days, params)
+    b = new_batch(games); b['mutated_strain_active'][::3] = True
+    scalar = [unpack(b, i) for i in range(games)]
+    gens = [np.random.default_rng(seed + i) for i in range(games)]
+    for d in range(days):
+        b, _, _ = run_simulation_batch(b, mods[d], noise=noise[d], params=params)
+        scalar = [run_simulation(s, mods[d], g, params)[0] for s, g in zip(scalar, gens)]
+    return sum(unpack(b, i) != scalar[i] for i in range(games))
+
+def play_seeded(rng):
+    state, event = GameState.new(rng.getrandbits(32))
+    while event["choices"]:
+        c = rng.randrange(len(event["choices"])) if rng.random() > 0.05 else None  # some timeouts
+        event, _ = state.advance(c)
+    return state
+
+def check_replay(games=200, seed=0):
+    """Seeded games whose replay or verification disagrees with the live game."""
+    rng = random.Random(seed); bad = 0
+    for _ in range(games):
+        state = play_seeded(rng)
+        stats, ending, sig, brain = state.stats(), state.ending, sign_seed(state.seed, state.brain), state.brain
+        tampered = dict(stats, pop=stats["pop"] + 1)
+        replayed, replayed_ending = replay_game(state.seed, decode_replay(state.replay()), brain)
+        bad += (GameState(replayed).stats() != stats or replayed_ending != ending  # same stats, whatever the flag's spelling
+                or not verify_game(state.seed, sig, state.replay(), stats, ending, brain)
+                or verify_game(state.seed, sig, state.replay(), tampered, ending, brain)
+                or verify_game(state.seed, "0" * 32, state.replay(), stats, ending, brain))
+    return bad
+
+def check_rollout(games=50, seed=1):
+    """Games played on one brain that fail to verify once another brain is live."""
+    rng = random.Random(seed)
+    states = [play_seeded(rng) for _ in range(games)]
+    other = {f"{i}{t}{c}": [float(rng.random()) for _ in range(3)] for i in range(3) for t in range(3) for c in range(3)}
+    with tempfile.NamedTemporaryFile('w', suffix='.json', delete=False) as f:
+        json.dump(other, f)
+    try:
+        simulate.load_virus_brain(f.name)
+        if all(s.brain == simulate.VIRUS_POLICY_CODE for s in states): return games  # no rollout happened
+        return sum(not verify_game(s.seed, sign_seed(s.seed, s.brain), s.replay(), s.stats(), s.ending, s.brain) for s in states)
+    finally:
+        simulate.load_virus_brain(simulate.VIRUS_BRAIN_FILE); os.unlink(f.name)
+
+CHECKS = [
+    ("batch == scalar (default params)", lambda: check_batch()),
+    ("batch == scalar (modified params)", lambda: check_batch(MODIFIED)),
+    ("replay == live game, verify_game", lambda: check_replay()),
+    ("in-flight games verify after a brain rollout", lambda: check_rollout()),
+]
+
+if __name__ == "__main__":
+    failed = 0
+    for name, check in CHECKS:
+        bad = check()
+        print(f"{'ok  ' if not bad else 'FAIL'} {name}" + (f": {bad} mismatches" if bad else ""))
+        failed += bool(bad)
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,135 @@
+"""In-process stand-in for the MongoDB collections simulate.py uses.
+
+Covers the small pymongo surface the API touches (find/sort/limit, find_one,
+update_one/find_one_and_update with $set/$inc/$max or a $set pipeline stage
+and upsert, bulk_write of UpdateOne, indexes)
+so benchmarks and tools can exercise the DB paths without a server.
+install(simulate) wires a fresh fake database into the module as ONLINE.
+"""
+import os
+import threading
+
+
+class FakeResult:
+    def __init__(self, matched_count, upserted_id=None):
+        self.matched_count = matched_count
+        self.upserted_id = upserted_id
+
+
+class FakeCursor:
+    def __init__(self, docs):
+        self.docs = docs
+
+    def sort(self, key, direction=1):
+        self.docs.sort(key=lambda d: d.get(key, 0), reverse=direction < 0)
+        return self
+
+    def limit(self, n):
+        self.docs = self.docs[:n]
+        return self
+
+    def __iter__(self):
+        return iter(self.docs)
+
+
+def _eval(expr, doc):
+    # The aggregation expressions the pipeline updates use: "$field", $literal,
+    # $cond, $lt and $max (a missing field sorts below numbers; $max skips it)
+    if isinstance(expr, str) and expr.startswith("$"): return doc.get(expr[1:])
+    if not isinstance(expr, dict): return expr
+    (op, args), = expr.items()
+    if op == "$literal": return args
+    vals = [_eval(a, doc) for a in args]
+    if op == "$cond": return vals[1] if vals[0] else vals[2]
+    if op == "$lt": return vals[0] is None and vals[1] is not None or None not in vals and vals[0] < vals[1]
+    if op == "$max": return max((v for v in vals if v is not None), default=None)
+    raise NotImplementedError(op)
+
+
+class FakeCollection:
+    def __init__(self):
+        self.docs = {}
+        self.unique = set()
+        self.lock = threading.Lock()
+
+    def _matches(self, doc, flt):
+        for k, v in flt.items():
+            if isinstance(v, dict):
+                cur = doc.get(k)
+                if "$lt" in v and not (cur is not None and cur < v["$lt"]): return False
+            elif doc.get(k) != v:
+                return False
+        return True
+
+    def create_index(self, keys, unique=False, **kwargs):
+        if unique: self.unique.add(keys if isinstance(keys, str) else keys[0][0])
+        return str(keys)
+
+    def find(self, flt=None, projection=None):
+        with self.lock:
+            docs = [dict(d) for d in self.docs.values() if self._matches(d, flt or {})]
+        for field, keep in (projection or {}).items():
+            if keep == 0:
+                for d in docs: d.pop(field, None)
+        return FakeCursor(docs)
+
+    def find_one(self, flt=None, projection=None):
+        return next(iter(self.find(flt, projection)), None)
+
+    def _update(self, flt, update, upsert):
+        # Returns (pre-image copy or None, updated doc or None, matched)
+        doc = next((d for d in self.docs.values() if self._matches(d, flt)), None)
+        before = None if doc is None else dict(doc)
+        if doc is None:
+            if not upsert: return None, None, False
+            doc = {k: v for k, v in flt.items() if not isinstance(v, dict)}
+            for field in self.unique:
+                if field in doc and any(d.get(field) == doc[field] for d in self.docs.values()):
+                    from pymongo.errors import DuplicateKeyError
+                    raise DuplicateKeyError(f"duplicate {field}")
+            doc.setdefault('_id', len(self.docs))
+            self.docs[doc['_id']] = doc
+        if isinstance(update, list):
+            for stage in update:
+                doc.update({k: _eval(v, doc) for k, v in stage["$set"].items()})
+            return before, doc, before is not None
+        for k, v in update.get("$set", {}).items(): doc[k] = v
+        for k, v in update.get("$inc", {}).items(): doc[k] = doc.get(k, 0) + v
+        for k, v in update.get("$max", {}).items(): doc[k] = max(doc.get(k, v), v)
+        return before, doc, before is not None
+
+    def update_one(self, flt, update, upsert=False):
+        with self.lock:
+            _, doc, matched = self._update(flt, update, upsert)
+        return FakeResult(int(matched), None if matched or doc is None else doc['_id'])
+
+    def find_one_and_update(self, flt, update, projection=None, upsert=False, return_document=False):
+        # return_document: pymongo's ReturnDocument.BEFORE (False) / AFTER (True)
+        with self.lock:
+            before, doc, _ = self._update(flt, update, upsert)
+            out = dict(doc) if return_document and doc is not None else before
+        if out is None or not projection: return out
+        if any(projection.values()):
+            return {k: v for k, v in out.items() if projection.get(k, k == '_id')}
+        return {k: v for k, v in out.items() if k not in projection}
+
+    def bulk_write(self, requests, ordered=True):
+        for r in requests:
+            self.update_one(r._filter, r._doc, upsert=r._upsert)
+
+
+class FakeDatabase(dict):
+    def __missing__(self, name):
+        col = self[name] = FakeCollection()
+        return col
+
+
+def install(simulate):
+    """Point simulate at a fresh fake database and mark it ONLINE."""
+    os.environ.setdefault('MONGODB_URI', 'fake://in-process')
+    db = FakeDatabase()
+    simulate.db = db
+    simulate.global_choices = db['player_choices']
+    simulate.leaderboard_col = db['leaderboard']
+    simulate.DB_STATUS = "ONLINE"
+    return db
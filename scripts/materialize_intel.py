@@ -0,0 +1,20 @@
+"""Rebuild the global intel snapshot from the player_choices counters.
+
+Game servers only re-read the snapshot document; this is the one thing that
+rebuilds it, so run it from cron (or a Vercel cron job), e.g. every 10 minutes:
+    MONGODB_URI=... python scripts/materialize_intel.py
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'api'))
+
+import simulate
+from _intel import materialize
+
+if __name__ == "__main__":
+    db = simulate.get_db()
+    if db is None:
+        sys.exit(f"Database unavailable: {simulate.DB_STATUS}")
+    doc = materialize(db['player_choices'], db['choice_intel'], simulate.EVENT_CATALOG)
+    print(f"Materialized choice shares for {len(doc['events'])} events")
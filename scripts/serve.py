@@ -0,0 +1,112 @@
+"""Standalone game server for self-hosting (outside Vercel).
+
+Serves the same request/response JSON contract as the serverless function at
+POST /api/simulate, plus GET /healthz. One long-lived process (or a pre-forked
+pool of them) keeps the event catalog, the virus policy, the leaderboard cache
+and one MongoDB client loaded across requests.
+
+  - ThreadingHTTPServer: one thread per connection
+  - HTTP/1.1 keep-alive (idle connections close after --keepalive seconds)
+  - --workers N: pre-fork N processes on one listening socket for multi-core;
+    each child opens its own Mongo client lazily (pymongo is not fork-safe).
+    Session mode then needs SESSION_STORE=mongo: in-memory sessions live in
+    one worker, and the next turn may land on another, so without a store
+    session requests are refused (stateless and seeded games are unaffected)
+  - SIGTERM/SIGINT: stop accepting, finish in-flight requests, flush the
+    buffered choice analytics, exit
+
+    python scripts/serve.py --port 8000 --workers 4
+    API_URL=http://127.0.0.1:8000 npm run start     # Next.js proxies /api/* here
+"""
+import argparse
+import json
+import os
+import signal
+import sys
+import threading
+from http.server import ThreadingHTTPServer
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'api'))
+
+import simulate
+
+API_PATH = "/api/simulate"
+
+
+class ServerHandler(simulate.handler):
+    protocol_version = "HTTP/1.1"  # keep-alive: every response carries Content-Length
+    timeout = 15
+    quiet = False
+
+    def do_POST(self):
+        if self.path.split("?", 1)[0] != API_PATH:
+            self.send_error(404); return
+        super().do_POST()
+
+    def do_GET(self):
+        if self.path != "/healthz":
+            self.send_error(404); return
+        body = json.dumps({"status": "ok", "pid": os.getpid(), "db": simulate.DB_STATUS}).encode()
+        self.send_response(200); self.send_header("Content-Type", "application/json"); self.send_header("Content-Length", str(len(body))); self.end_headers(); self.wfile.write(body)
+
+    def log_message(self, fmt, *args):
+        if not self.quiet: super().log_message(fmt, *args)
+
+
+class GameServer(ThreadingHTTPServer):
+    daemon_threads = False  # server_close() waits for in-flight requests
+    request_queue_size = 1024
+
+
+def serve(server):
+    def stop(signum, frame):
+        # shutdown() blocks until serve_forever() returns, so it can't run on this thread
+        threading.Thread(target=server.shutdown, daemon=True).start()
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    server.serve_forever()
+    server.server_close()
+    simulate.CHOICE_ANALYTICS.stop()
+
+def run_workers(server, workers):
+    # Parent binds once and forks; children inherit the socket and the loaded
+    # catalog/policy (copy-on-write). The parent only supervises.
+    pids = []
+    for _ in range(workers):
+        pid = os.fork()
+        if pid == 0:
+            try: serve(server)
+            finally: os._exit(0)
+        pids.append(pid)
+
+    def forward(signum, frame):
+        for pid in pids:
+            try: os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError: pass
+    signal.signal(signal.SIGTERM, forward)
+    signal.signal(signal.SIGINT, forward)
+    for pid in pids:
+        while True:
+            try: os.waitpid(pid, 0); break
+            except InterruptedError: continue
+    server.server_close()
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--host", default="0.0.0.0")
+    ap.add_argument("--port", type=int, default=8000)
+    ap.add_argument("--workers", type=int, default=1, help="pre-forked processes (default 1)")
+    ap.add_argument("--keepalive", type=float, default=15, help="idle keep-alive timeout, seconds")
+    ap.add_argument("--quiet", action="store_true", help="no per-request access log")
+    args = ap.parse_args()
+
+    ServerHandler.timeout = args.keepalive
+    ServerHandler.quiet = args.quiet
+    server = GameServer((args.host, args.port), ServerHandler)
+    print(f"Serving {API_PATH} on {args.host}:{args.port} with {args.workers} worker(s)", flush=True)
+    if args.workers > 1 and simulate.SESSIONS.store is None:
+        simulate.SESSIONS_UNAVAILABLE = "SESSIONS NEED SESSION_STORE=mongo"
+        print("Session mode disabled: --workers > 1 needs SESSION_STORE=mongo", file=sys.stderr, flush=True)
+    if args.workers > 1: run_workers(server, args.workers)
+    else: serve(server)
@@ -0,0 +1,218 @@
+"""Parameter sweeps over the epidemiology model (simulate.SimParams).
+
+Evaluates a grid or a Latin hypercube of parameter sets, one set per task
+across a process pool, and reports for each set:
+  - ending rates (victory / extinction / revolution / collapse / timeout)
+  - mean survival day and mean calculate_score()
+  - hospital collapse frequency (share of game-days with hospitals overwhelmed)
+
+Every set is evaluated on the same seeds, so differences between rows come
+from the parameters, not the dice. Results are cached on disk, one file per
+hash of (parameters, engine setup, event catalog + virus policy), so
+re-running or widening a sweep only evaluates the new sets.
+
+    python scripts/sweep.py --vary r0_base=1.2:1.8 --vary compliance_factor=0.3:0.5 --grid 5
+    python scripts/sweep.py --vary r0_base=1.2:1.8 --vary cure_coef=0.1:0.3 --vary hospital_base=30:50 --lhs 64
+    python scripts/sweep.py --vary cure_threshold=10,20,30 --engine turns --policy greedy:trust --out sweep.csv
+
+--vary name=lo:hi is a range (grid: --grid evenly spaced points, LHS: one
+stratum per sample); name=a,b,c is an explicit list of values.
+
+Engines:
+  batch   _batch.run_simulation_batch(), all games of a set at once; the player
+          picks a uniformly random option from the catalog each day (as in
+          train_brain.py). Fast, but there are no event arcs, so
+          mutation_r0_bonus has no effect.
+  turns   the real turn loop (simulate.play_turn) with a --policy from
+          balance.py, story and mutation arcs included. Much slower.
+"""
+import argparse
+import csv
+import hashlib
+import itertools
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'api'))
+
+import simulate
+from simulate import EVENT_CATALOG, SimParams, calculate_score, new_game, play_turn
+from _batch import (ENDING_BONUS, ENDINGS, STAT_KEYS, batch_score, check_endings, choice_mods_matrix, game_rngs, init_worker,
+                    make_policy, new_batch, run_simulation_batch)
+
+CACHE_DIR = os.path.join(ROOT, '.sweep_cache')
+CACHE_VERSION = 2  # bump when the engines or metrics change
+OUTCOMES = ("ending_victory", "ending_extinction", "ending_revolution", "ending_collapse", "timeout")
+METRICS = ("victory", "extinction", "revolution", "collapse", "timeout", "mean_day", "mean_score", "hospital_days")
+
+# ==========================================
+# PARAMETER SETS
+# ==========================================
+def parse_vary(spec):
+    name, _, values = spec.partition("=")
+    if name not in SimParams._fields: raise ValueError(f"unknown parameter: {name} (one of {', '.join(SimParams._fields)})")
+    if ":" in values:
+        lo, hi = map(float, values.split(":")); return name, (lo, hi)
+    return name, [float(v) for v in values.split(",")]
+
+def grid_sets(axes, points):
+    values = [np.linspace(v[0], v[1], points).tolist() if isinstance(v, tuple) else v for _, v in axes]
+    return [dict(zip([n for n, _ in axes], combo)) for combo in itertools.product(*values)]
+
+def lhs_sets(axes, samples, seed=0):
+    # Latin hypercube: each axis is cut into `samples` strata, every stratum used once
+    rng = np.random.default_rng(seed)
+    cols = []
+    for _, v in axes:
+        u = (rng.permutation(samples) + rng.random(samples)) / samples
+        cols.append(v[0] + u * (v[1] - v[0]) if isinstance(v, tuple) else np.asarray(v)[(u * len(v)).astype(int)])
+    return [{n: float(c[i]) for (n, _), c in zip(axes, cols)} for i in range(samples)]
+
+def make_params(overrides):
+    return SimParams()._replace(**{k: float(v) for k, v in overrides.items()})
+
+# ==========================================
+# ENGINES
+# ==========================================
+def summarize(endings, days, scores, hospital_days, game_days):
+    n = len(endings)
+    m = {o.replace("ending_", ""): sum(e == o for e in endings) / n for o in OUTCOMES}
+    m.update(mean_day=float(np.mean(days)), mean_score=float(np.mean(scores)), hospital_days=hospital_days / max(1, game_days))
+    return m
+
+def evaluate_batch(params, games, seed, max_days):
+    rng = np.random.default_rng(seed)
+    mods = choice_mods_matrix()
+    b = new_batch(games)
+    alive = np.ones(games, dtype=bool); code = np.zeros(games, dtype=np.int8)
+    day = np.zeros(games, dtype=np.int64); score = np.zeros(games)
+    hospital = game_days = 0
+    for _ in range(max_days - 1):  # games start on day 1; still running on max_days = timeout
+        pick = mods[rng.integers(len(mods), size=games)]
+        b, _, collapsed = run_simulation_batch(b, {k: pick[:, j] for j, k in enumerate(STAT_KEYS)}, rng=rng, params=params)
+        hospital += int((collapsed & alive).sum()); game_days += int(alive.sum())
+        c = check_endings(b); ended = alive & (c > 0)
+        code[ended] = c[ended]; day[ended] = b['day'][ended]; score[ended] = (batch_score(b) + ENDING_BONUS[c])[ended]
+        alive &= c == 0
+        if not alive.any(): break
+    day[alive] = b['day'][alive]; score[alive] = batch_score(b)[alive]  # timeouts: no ending bonus
+    endings = [ENDINGS[c] or "timeout" for c in code]
+    return summarize(endings, day, score, hospital, game_days)
+
+def evaluate_turns(params, games, seed, max_days, policy_spec):
+    # Same seeds as balance.play_game(), so a set's games line up with balance.py runs
+    policy = make_policy(policy_spec)
+    endings, days, scores = [], [], []; hospital = game_days = 0
+    for g in range(seed, seed + games):
+        sim_rng, event_rng, choice_rng = game_rngs(g)
+        stats, event_id, event = new_game(); played = {event_id}
+        while event["choices"]:
+            if stats['day'] >= max_days:
+                event_id = "timeout"; break
+            stats, event_id, event, flavor = play_turn(stats, played, event_id, policy(event, choice_rng), sim_rng, event_rng, params=params)
+            hospital += "Hospitals overwhelmed" in flavor; game_days += 1
+        endings.append(event_id); days.append(stats['day']); scores.append(calculate_score(stats, event_id))
+    return summarize(endings, days, scores, hospital, game_days)
+
+def _evaluate(task):
+    overrides, setup = task
+    params = make_params(overrides)
+    if setup["engine"] == "turns": return evaluate_turns(params, setup["games"], setup["seed"], setup["max_days"], setup["policy"])
+    return evaluate_batch(params, setup["games"], setup["seed"], setup["max_days"])
+
+# ==========================================
+# DISK CACHE
+# ==========================================
+def model_fingerprint(engine):
+    # What the results depend on besides the parameters: virus policy, and the
+    # catalog (turns) or the option mods the batch player draws from (batch)
+    h = hashlib.sha256(simulate.VIRUS_POLICY.tobytes())
+    h.update(json.dumps(EVENT_CATALOG, sort_keys=True).encode() if engine == "turns" else choice_mods_matrix().tobytes())
+    return h.hexdigest()[:16]
+
+def cache_key(overrides, setup):
+    params = {k: float(v) for k, v in make_params(overrides)._asdict().items()}
+    blob = json.dumps({"params": params, "setup": setup, "version": CACHE_VERSION}, sort_keys=True)
+    return hashlib.sha256(blob.encode()).hexdigest()[:24]
+
+def cache_load(cache_dir, key):
+    try:
+        with open(os.path.join(cache_dir, key + ".json")) as f: return json.load(f)["metrics"]
+    except (OSError, ValueError, KeyError):
+        return None
+
+def cache_store(cache_dir, key, overrides, setup, metrics):
+    os.makedirs(cache_dir, exist_ok=True)
+    path = os.path.join(cache_dir, key + ".json"); tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, 'w') as f: json.dump({"overrides": overrides, "setup": setup, "metrics": metrics}, f)
+    os.replace(tmp, path)
+
+def run_sweep(sets, setup, workers=None, brain_path=None, cache_dir=CACHE_DIR):
+    """Metrics for every parameter set (list of override dicts), cached ones read from disk."""
+    keys = [cache_key(o, setup) for o in sets]
+    done = {k: cache_load(cache_dir, k) for k in set(keys)} if cache_dir else {}
+    # One run per distinct key: the {} baseline and a grid point at the defaults are the same set
+    todo = {k: o for k, o in zip(keys, sets) if done.get(k) is None}
+    if todo:
+        with ProcessPoolExecutor(max_workers=workers, initializer=init_worker, initargs=(brain_path,)) as pool:
+            for k, metrics in zip(todo, pool.map(_evaluate, [(o, setup) for o in todo.values()])):
+                done[k] = metrics
+                if cache_dir: cache_store(cache_dir, k, todo[k], setup, metrics)
+    return [done[k] for k in keys], sum(k not in todo for k in keys)
+
+# ==========================================
+# REPORTING
+# ==========================================
+def write_csv(path, names, sets, results):
+    with open(path, 'w', newline='') as f:
+        w = csv.writer(f); w.writerow(list(names) + list(METRICS))
+        w.writerows([o.get(n, getattr(SimParams(), n)) for n in names] + [r[m] for m in METRICS] for o, r in zip(sets, results))
+
+def report(names, sets, results):
+    head = "".join(f"{n[:16]:>17}" for n in names) + "  victory extinct  revolt collapse timeout  mean_day  mean_score  hosp_days"
+    lines = [head]
+    for o, r in zip(sets, results):
+        cells = "".join(f"{o.get(n, getattr(SimParams(), n)):>17.4g}" for n in names)
+        lines.append(cells + f"  {r['victory']:7.1%} {r['extinction']:7.1%} {r['revolution']:7.1%} {r['collapse']:7.1%} {r['timeout']:7.1%}"
+                             f"  {r['mean_day']:8.1f}  {r['mean_score']:10.0f}  {r['hospital_days']:9.1%}")
+    return "\n".join(lines)
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--vary", action="append", default=[], metavar="NAME=LO:HI|A,B,..", help="parameter to sweep (repeatable)")
+    ap.add_argument("--grid", type=int, default=5, help="points per range axis for a grid sweep (default 5)")
+    ap.add_argument("--lhs", type=int, help="Latin-hypercube sample of this many sets instead of a grid")
+    ap.add_argument("-n", "--games", type=int, default=4000, help="games per parameter set")
+    ap.add_argument("--engine", choices=("batch", "turns"), default="batch")
+    ap.add_argument("--policy", default="random", help="player policy for --engine turns (see balance.py)")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--max-days", type=int, default=365)
+    ap.add_argument("--workers", type=int, default=None, help="process pool size (default: all cores)")
+    ap.add_argument("--brain", help="virus policy JSON to evaluate instead of the deployed one")
+    ap.add_argument("--cache-dir", default=CACHE_DIR)
+    ap.add_argument("--no-cache", action="store_true")
+    ap.add_argument("--sort", choices=METRICS, help="sort rows by this metric (descending)")
+    ap.add_argument("--out", help="also write the table as CSV")
+    args = ap.parse_args()
+
+    try: axes = [parse_vary(v) for v in args.vary]
+    except ValueError as e: ap.error(str(e))
+    sets = lhs_sets(axes, args.lhs, args.seed) if args.lhs else grid_sets(axes, args.grid)
+    sets.insert(0, {})  # baseline: the live defaults
+    init_worker(args.brain)
+    setup = {"engine": args.engine, "games": args.games, "seed": args.seed, "max_days": args.max_days,
+             "policy": args.policy if args.engine == "turns" else None, "model": model_fingerprint(args.engine)}
+
+    results, cached = run_sweep(sets, setup, args.workers, args.brain, None if args.no_cache else args.cache_dir)
+    print(f"{len(sets)} parameter sets x {args.games} games ({args.engine} engine), {cached} from cache; first row is the baseline\n")
+    order = sorted(range(len(sets)), key=lambda i: -results[i][args.sort]) if args.sort else range(len(sets))
+    names = [n for n, _ in axes]
+    print(report(names, [sets[i] for i in order], [results[i] for i in order]))
+    if args.out:
+        write_csv(args.out, names, sets, results)
+        print(f"\nWrote {len(sets)} rows to {args.out}")
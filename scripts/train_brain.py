@@ -0,0 +1,119 @@
+"""Train the VIRUS_BRAIN policy table offline.
+
+Tabular Q-learning over the same 27 (inf, trust, cure) buckets that
+get_virus_action() reads. The environment is the vectorized batch engine
+(api/_batch.py), i.e. the real run_simulation() dynamics for thousands of
+parallel games. The player is modeled as picking a uniformly random option
+from the event catalog each day.
+
+The virus is adversarial: its reward is minus the change in the commander's
+calculate_score() (survival days, pop, trust, cure and the ending bonus), so
+it learns to end games early and badly. One decision spans the 5 days
+between AI turns.
+
+    python scripts/train_brain.py                      # writes virus_brain.json
+    python scripts/train_brain.py --seed 7 --out /tmp/brain.json
+
+The same seed always produces the same table.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'api'))
+
+import simulate
+from _batch import ENDING_BONUS, STAT_KEYS, batch_score, check_endings, choice_mods_matrix, new_batch, policy_index, run_simulation_batch
+
+N_STATES, N_ACTIONS = 27, 3
+
+def run_episodes(n, rng, mods, q=None, eps=0.0, policy=None, max_days=200, alpha=0.1, gamma=0.9):
+    """Play n parallel games to the end.
+
+    With q given, the virus acts eps-greedily on it and q is updated in place;
+    otherwise it follows the flat policy table (default: the deployed brain).
+    Returns final scores.
+    """
+    b = new_batch(n)
+    alive = np.ones(n, dtype=bool)
+    score = batch_score(b).astype(float)
+    prev_s = np.full(n, -1); prev_a = np.zeros(n, dtype=np.int64); acc = np.zeros(n)
+
+    def learn(mask, target):
+        # Batched TD update: move each Q[s, a] toward the mean target seen this step
+        keys = prev_s[mask] * N_ACTIONS + prev_a[mask]
+        cnt = np.bincount(keys, minlength=N_STATES * N_ACTIONS)
+        tot = np.bincount(keys, weights=target, minlength=N_STATES * N_ACTIONS)
+        hit = cnt > 0
+        flat = q.reshape(-1); flat[hit] += alpha * (tot[hit] / cnt[hit] - flat[hit])
+
+    for _ in range(max_days):
+        pick = mods[rng.integers(len(mods), size=n)]
+        choice = {k: pick[:, j] for j, k in enumerate(STAT_KEYS)}
+        actions = None
+        if q is not None and (b['day'][0] + 1) % 5 == 0:
+            # State the AI will see: after the player's mods, like run_simulation()
+            s = policy_index({k: np.clip(b[k] + choice[k], 0, 100) for k in ("inf", "trust", "cure")})
+            greedy = q[s].argmax(axis=1)
+            actions = np.where(rng.random(n) < eps, rng.integers(N_ACTIONS, size=n), greedy)
+            done_decision = alive & (prev_s >= 0)
+            if done_decision.any(): learn(done_decision, acc[done_decision] + gamma * q[s[done_decision]].max(axis=1))
+            prev_s = np.where(alive, s, prev_s); prev_a = np.where(alive, actions, prev_a); acc[:] = 0
+
+        b, _, _ = run_simulation_batch(b, choice, rng=rng, policy=policy, ai_action=actions)
+        code = check_endings(b)
+        new_score = batch_score(b) + ENDING_BONUS[code]
+        # Virus reward (per 100 points): whatever the commander gains, it loses
+        acc += np.where(alive, -(new_score - score) / 100.0, 0)
+        score = np.where(alive, new_score, score)
+
+        ended = alive & (code > 0)
+        if q is not None and (ended & (prev_s >= 0)).any():
+            m = ended & (prev_s >= 0); learn(m, acc[m])
+        alive &= code == 0
+        if not alive.any(): break
+    return score
+
+def train(episodes=400_000, batch=8192, seed=0, alpha=0.1, gamma=0.9):
+    rng = np.random.default_rng(seed)
+    mods = choice_mods_matrix()
+    q = np.zeros((N_STATES, N_ACTIONS))
+    iters = max(1, episodes // batch)
+    for it in range(iters):
+        eps = max(0.05, 1.0 - it / (0.7 * iters))
+        run_episodes(batch, rng, mods, q=q, eps=eps, alpha=alpha, gamma=gamma)
+    return q
+
+def to_brain(q):
+    # Existing virus_brain.json format: "<inf><trust><cure>" -> Q-values per action
+    return {f"{i // 9}{i // 3 % 3}{i % 3}": [round(float(v), 3) for v in q[i]] for i in range(N_STATES)}
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--episodes", type=int, default=400_000)
+    ap.add_argument("--batch", type=int, default=8192, help="parallel games per iteration")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--alpha", type=float, default=0.1)
+    ap.add_argument("--gamma", type=float, default=0.9)
+    ap.add_argument("--out", default=os.path.join(ROOT, 'virus_brain.json'))
+    args = ap.parse_args()
+
+    t = time.perf_counter()
+    q = train(args.episodes, args.batch, args.seed, args.alpha, args.gamma)
+    print(f"Trained on {args.episodes} episodes in {time.perf_counter() - t:.1f}s")
+
+    # Evaluate against a no-op virus and the deployed brain on the same fresh games
+    mods = choice_mods_matrix()
+    trained = q.argmax(axis=1).astype(np.int8)
+    for label, table in (("no-op brain", np.zeros(N_STATES, dtype=np.int8)), ("deployed brain", simulate.VIRUS_POLICY.reshape(-1)), ("trained brain", trained)):
+        scores = run_episodes(20_000, np.random.default_rng(args.seed + 1), mods, policy=table)
+        print(f"  {label:<14} mean commander score {scores.mean():8.1f}")
+
+    with open(args.out, 'w') as f:
+        json.dump(to_brain(q), f, indent=1)
+    print(f"Wrote {args.out}")
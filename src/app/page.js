@@ -78,7 +78,11 @@ export default function Home() {
   const [stats, setStats] = useState({ day: 1, pop: 100, trust: 70, eco: 80, inf: 5, cure: 0 });
   const [terminalLogs, setTerminalLogs] = useState([]); 
   const [currentEventId, setCurrentEventId] = useState(null);
-  const [usedEvents, setUsedEvents] = useState([]); 
+  const [usedBits, setUsedBits] = useState(""); 
+  const [seed, setSeed] = useState(null);
+  const [seedSig, setSeedSig] = useState(null);
+  const [brain, setBrain] = useState(null);
+  const [replay, setReplay] = useState("");
   const [activeChoices, setActiveChoices] = useState([]); 
   const [input, setInput] = useState("");
 
@@ -155,7 +159,10 @@ export default function Home() {
             stats,
             choice_index: choiceIndex,
             last_event_id: currentEventId,
-            used_events: usedEvents,
+            used_bits: usedBits,
+            seed,
+            brain,
+            replay,
             is_init: isInit
         }),
       });
@@ -167,6 +174,7 @@ export default function Home() {
           // --- END GAME: TRIGGER MODAL ---
           setStats(data.stats);
           setCurrentEventId(data.event_id);
+          setReplay(data.replay);
           setEndingNarrative(data.narrative);
           
           playRadio();
@@ -175,11 +183,16 @@ export default function Home() {
           // --- NORMAL TURN ---
           setStats(data.stats);
           setCurrentEventId(data.event_id);
-          setUsedEvents(data.used_events);
+          setUsedBits(data.used_bits);
+          setSeed(data.seed);
+          if (data.seed_sig) setSeedSig(data.seed_sig);
+          setBrain(data.brain);
+          setReplay(data.replay);
           setActiveChoices(data.choices);
           
           setTerminalLogs(prev => [
-            ...prev, 
+            ...prev,
+            ...(data.choice_share != null ? [{ text: `>> GLOBAL INTEL: ${data.choice_share}% OF COMMANDERS CHOSE THIS.`, type: 'instant' }] : []),
             { text: data.narrative, choices: data.choices, type: 'typewriter' }
           ]);
       }
@@ -209,7 +222,11 @@ export default function Home() {
                 user_id: commanderId, 
                 name: playerName, 
                 stats: stats, 
-                ending: currentEventId 
+                ending: currentEventId,
+                seed: seed,
+                seed_sig: seedSig,
+                brain: brain,
+                replay: replay 
             })
         });
         